@@ -6,7 +6,10 @@ docs [1] and at a canonical exemplar module [2].
 [1]: https://docs.deep-hybrid-datacloud.eu/
 [2]: https://github.com/deephdc/demo_app
 """
+import asyncio
+import functools
 import logging
+import time
 
 import demo_advanced as aimodel
 
@@ -35,6 +38,8 @@ def get_metadata():
             "datasets": utils.ls_datasets(),
             "models": utils.ls_models(),
         }
+        if aimodel.reporting.enabled():  # Written by predicting processes
+            metadata["serving"] = aimodel.reporting.collect()
         logger.debug("Package model metadata: %s", metadata)
         return metadata
     except Exception as err:
@@ -50,14 +55,14 @@ def warm():
     """
     try:  # Call your AI model warm() method
         logger.info("Warming up the model.api...")
-        aimodel.warm()
+        aimodel.warm(model_names=utils.ls_models())
     except Exception as err:
         logger.error("Error when warming up: %s", err, exc_info=True)
         raise  # Reraise the exception after log
 
 
 @utils.predict_arguments(schema=schemas.PredArgsSchema)
-def predict(model_name, input_file, accept="application/json", **options):
+def predict(model_name, input_file=None, accept="application/json", **options):
     """Performs {model} prediction from given input data and parameters.
 
     Arguments:
@@ -67,10 +72,23 @@ def predict(model_name, input_file, accept="application/json", **options):
         **options -- Arbitrary keyword arguments from PredArgsSchema.
 
     Options:
+        version -- Model version number or stage, default Production.
+        dataset -- Dataset path to predict when input_file is not provided.
+        array_name -- Array from dataset to predict, default x_train.
         batch_size -- Number of samples per batch.
         steps -- Steps before prediction round is finished.
+        timeout -- Seconds after which the prediction is dropped.
+        cascade_model -- Model to predict rows below threshold confidence.
+        threshold -- Minimum confidence to accept model_name predictions.
+        rule -- Rule to combine outputs when model_name is an ensemble.
+        top_k -- Return only labels and probabilities of the k best classes.
+        precision -- Float dtype of binary (npy/npz) responses.
+        block_rows -- Rows per line of ndjson responses, default 1.
+        accept_encoding -- Encodings accepted to compress binary responses.
 
     Raises:
+        ServiceUnavailable: Model overloaded, returns 503 with Retry-After.
+        GatewayTimeout: Request timeout passed before predict, returns 504.
         HTTPException: Unexpected errors aim to return 50X
 
     Returns:
@@ -78,17 +96,68 @@ def predict(model_name, input_file, accept="application/json", **options):
     """
     try:  # Call your AI model predict() method
         logger.info("Using model %s for predictions", model_name)
-        logger.debug("Loading data from input_file: %s", input_file.filename)
+        input_file = _input_path(input_file, options.pop("dataset", None))
+        deadline = _deadline(options.pop("timeout", None))
+        k = options.pop("top_k", None)  # Response options, not for predict
+        precision = options.pop("precision", None)
+        block_rows = options.pop("block_rows", None)
+        accept_encoding = options.pop("accept_encoding", None)
+        logger.debug("Loading data from input_file: %s", input_file)
         logger.debug("Predict with options: %s", options)
-        result = aimodel.predict(model_name, input_file.filename, **options)
-        logger.debug("Predict result: %s", result)
+        if accept == "application/x-ndjson":  # Predicted while encoded
+            result = _predict_chunks(
+                model_name, input_file, block_rows, k,
+                deadline=deadline, **options,
+            )
+        else:
+            result = aimodel.predict(
+                model_name, input_file, deadline=deadline, **options
+            )
+            logger.debug("Predict result: %s", result)
+            if k is not None:
+                result = responses.top_k(result, k)
         logger.info("Returning content_type for: %s", accept)
-        return responses.content_types[accept](result, **options)
+        response = responses.content_types[accept]
+        response = response(
+            result, precision=precision, block_rows=block_rows, **options
+        )
+        return responses.compress(response, accept_encoding)
+    except aimodel.admission.OverloadError as err:
+        logger.warning("Rejected prediction: %s", err)
+        retry_after = config.RETRY_AFTER
+        raise utils.ServiceUnavailable(str(err), retry_after) from err
+    except aimodel.admission.DeadlineExceeded as err:
+        logger.warning("Dropped prediction: %s", err)
+        raise utils.GatewayTimeout(str(err)) from err
     except Exception as err:
         logger.error("Error calculating predictions: %s", err, exc_info=True)
         raise  # Reraise the exception after log
 
 
+def _input_path(input_file, dataset):
+    if input_file is not None:
+        return input_file.filename
+    if dataset is not None:  # Read server side dataset from disk
+        return dataset
+    raise ValueError("Either input_file or dataset is required.")
+
+
+def _predict_chunks(model_name, input_file, block_rows, k, **options):
+    block_rows = block_rows or 1  # Chunks hold whole blocks of rows
+    chunk_rows = -(-aimodel.config.STREAM_CHUNK_ROWS // block_rows)
+    chunks = aimodel.predict_chunks(
+        model_name, input_file, chunk_rows * block_rows, **options
+    )
+    for start, result in chunks:
+        yield start, result if k is None else responses.top_k(result, k)
+
+
+def _deadline(timeout):
+    if timeout is None:
+        return None
+    return time.monotonic() + timeout
+
+
 @utils.train_arguments(schema=schemas.TrainArgsSchema)
 def train(model_name, input_file, accept="application/json", **options):
     """Performs {model} training from given input data and parameters.
@@ -100,6 +169,7 @@ def train(model_name, input_file, accept="application/json", **options):
         **options -- Arbitrary keyword arguments from TrainArgsSchema.
 
     Options:
+        version -- Model version number or stage to train from.
         epochs -- Number of epochs to train the model.
         initial_epoch -- Epoch at which to start training.
         steps_per_epoch -- Steps before declaring an epoch finished.
@@ -126,3 +196,35 @@ def train(model_name, input_file, accept="application/json", **options):
     except Exception as err:
         logger.error("Error while training: %s", err, exc_info=True)
         raise  # Reraise the exception after log
+
+
+async def predict_async(model_name, input_file, **options):
+    """Coroutine variant of predict, runs on the inference executor.
+
+    Arguments:
+        model_name -- Model name from registry to use for prediction values.
+        input_file -- File with data to perform predictions from model.
+        **options -- Arbitrary keyword arguments, see predict.
+
+    Returns:
+        The predicted model values or files.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(predict, model_name, input_file, **options)
+    return await loop.run_in_executor(utils.inference_executor, call)
+
+
+async def train_async(model_name, input_file, **options):
+    """Coroutine variant of train, runs on the training executor.
+
+    Arguments:
+        model_name -- Model name from registry to use for training values.
+        input_file -- File with data and labels to use for training.
+        **options -- Arbitrary keyword arguments, see train.
+
+    Returns:
+        Dictionary containing run information.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(train, model_name, input_file, **options)
+    return await loop.run_in_executor(utils.training_executor, call)
@@ -7,6 +7,7 @@ file on your model package to define CONSTANTS related to your model.
 
 By convention, the CONSTANTS defined in this module are in UPPER_CASE.
 """
+import os
 from importlib import metadata
 
 # Ensure that your model package has a config.py file with the following
@@ -27,3 +28,24 @@ _AUTHORS = API_METADATA.get("Author", "").split(", ")
 _AUTHORS = [] if _AUTHORS == [""] else _AUTHORS
 _AUTHORS += API_METADATA["Author-emails"].keys()
 API_METADATA["Authors"] = sorted(_AUTHORS)
+
+# Configuration of executors for non-blocking model calls
+INFERENCE_WORKERS = int(os.getenv("DEMO_ADVANCED_INFERENCE_WORKERS", "4"))
+TRAINING_WORKERS = int(os.getenv("DEMO_ADVANCED_TRAINING_WORKERS", "1"))
+
+# Seconds clients are asked to wait before retrying overloaded predictions
+RETRY_AFTER = int(os.getenv("DEMO_ADVANCED_RETRY_AFTER", "1"))
+
+# Configuration of negotiated response compression
+COMPRESSION_MIN_BYTES = int(
+    os.getenv("DEMO_ADVANCED_COMPRESSION_MIN_BYTES", "1024")
+)
+GZIP_LEVEL = int(os.getenv("DEMO_ADVANCED_GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("DEMO_ADVANCED_ZSTD_LEVEL", "3"))
+
+# Maximum result rows rendered on pdf reports, larger results are sampled
+PDF_MAX_ROWS = int(os.getenv("DEMO_ADVANCED_PDF_MAX_ROWS", "1000"))
+
+# Decimal places of floats on json responses, empty for full precision
+JSON_DECIMALS = os.getenv("DEMO_ADVANCED_JSON_DECIMALS", "6")
+JSON_DECIMALS = int(JSON_DECIMALS) if JSON_DECIMALS else None
@@ -5,20 +5,74 @@ method into the desired format.
 The module shows simple but efficient example functions. However, you may
 need to modify them for your needs.
 """
+import gzip
 import io
+import json
 import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+from concurrent import futures
 
 import numpy as np
+from aiohttp import payload
 from fpdf import FPDF
 
-from . import config  # noqa: F401
+from . import config
+
+try:  # Optional, zstd encoding only offered when installed
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:  # Optional, arrays are formatted with numpy when not installed
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Minimum array size to format with numpy when orjson is not installed
+VECTORIZE_MIN_SIZE = 256
+
+
+def top_k(result, k):
+    """Reduces class probabilities to the k best classes of each row.
+
+    Arguments:
+        result -- Array with class probabilities for each row, or dictionary
+          with the probabilities at "predictions" (e.g. ensembles).
+        k -- Number of classes to keep per row, 1 keeps only the labels.
+
+    Returns:
+        Dictionary with the uint8 "labels" of the best classes, sorted by
+        probability, and their float16 "probabilities" when k > 1.
+    """
+    if isinstance(result, dict):
+        return {**result, "predictions": top_k(result["predictions"], k)}
+    result = np.asarray(result)
+    k = min(k, result.shape[-1])
+    dtype = np.uint8 if result.shape[-1] <= 256 else np.uint16
+    if k == 1:  # Labels only, no partial sort required
+        return {"labels": np.argmax(result, axis=-1).astype(dtype)}
+    best = np.argpartition(-result, k - 1, axis=-1)[..., :k]
+    probabilities = np.take_along_axis(result, best, axis=-1)
+    order = np.argsort(-probabilities, axis=-1)
+    return {
+        "labels": np.take_along_axis(best, order, axis=-1).astype(dtype),
+        "probabilities": np.take_along_axis(probabilities, order, axis=-1)
+        .astype(np.float16),
+    }
+
 
 def json_response(result, **options):
     """Converts the prediction or training results into json return format.
 
+    Float arrays are rounded in bulk to config.JSON_DECIMALS decimal places,
+    float16 values to 4 at most, before converting them into lists, which
+    reduces the size and the serialization time of the response.
+
     Arguments:
         result -- Result value from call, expected either dict or str
           (see https://docs.deep-hybrid-datacloud.eu/projects/deepaas/en/stable/user/v2-api.html).  # noqa
@@ -34,23 +88,148 @@ def json_response(result, **options):
     logger.debug("Response result: %d", result)
     logger.debug("Response options: %d", options)
     try:
-        if isinstance(result, (dict, list, str)):
+        if isinstance(result, dict):
+            return {k: json_response(v) for k, v in result.items()}
+        if isinstance(result, (list, str, int, float)):
             return result
-        if isinstance(result, np.ndarray):
-            return result.tolist()
-        return result.history
+        if isinstance(result, (np.ndarray, np.generic)):
+            return _rounded(result).tolist()
+        history = result.history.items()  # Training results
+        return {k: json_response(np.asarray(v)) for k, v in history}
     except Exception as err:  # TODO: Fix to specific exception
         logger.warning("Error converting result to json: %s", err)
         raise RuntimeError("Unsupported response type") from err
 
 
+def dumps(result):
+    """Encodes the prediction or training results into json bytes.
+
+    Arrays are serialized in bulk, with orjson when installed or formatted
+    with numpy otherwise, instead of converting each value to a python
+    object first. Floats are rounded as on json_response.
+
+    Arguments:
+        result -- Result value from call, expected either dict or array.
+
+    Raises:
+        RuntimeError: Unsupported response type.
+
+    Returns:
+        Bytes with the json encoded result.
+    """
+    try:
+        if orjson is not None:
+            option = orjson.OPT_SERIALIZE_NUMPY
+            return orjson.dumps(_prepared(result), option=option)
+        return _encode(result)
+    except Exception as err:  # TODO: Fix to specific exception
+        logger.warning("Error encoding result to json: %s", err)
+        raise RuntimeError("Unsupported response type") from err
+
+
+def _prepared(result):
+    if isinstance(result, dict):
+        return {k: _prepared(v) for k, v in result.items()}
+    if isinstance(result, (list, str, int, float)):
+        return result
+    if isinstance(result, (np.ndarray, np.generic)):
+        if result.dtype.kind in "USO":  # Text, e.g. file names
+            return result.tolist()
+        result = _rounded(result)
+        if result.ndim == 0:  # Contiguous arrays have at least one axis
+            return result.item()
+        return np.ascontiguousarray(result)
+    history = result.history.items()  # Training results
+    return {k: _prepared(np.asarray(v)) for k, v in history}
+
+
+def _encode(result):
+    if isinstance(result, dict):
+        items = (
+            json.dumps(str(key)).encode() + b":" + _encode(value)
+            for key, value in result.items()
+        )
+        return b"{" + b",".join(items) + b"}"
+    if isinstance(result, np.ndarray) and result.size >= VECTORIZE_MIN_SIZE:
+        array = _rounded(result)
+        if array.ndim and _is_fixed_point(array):
+            return _encode_array(array)
+    return json.dumps(json_response(result)).encode()
+
+
+def _rounded(array):
+    if not np.issubdtype(array.dtype, np.floating):
+        return array
+    decimals = config.JSON_DECIMALS
+    if array.dtype == np.float16:  # Drop digits beyond precision
+        decimals = 4 if decimals is None else min(decimals, 4)
+    if decimals is None:
+        return array
+    return np.round(array.astype(np.float64), decimals)
+
+
+def _is_fixed_point(array):
+    if np.issubdtype(array.dtype, np.integer):  # Magnitudes fit int64
+        bounds = np.iinfo(np.int64)
+        return bounds.min < array.min() and array.max() <= bounds.max
+    if not np.issubdtype(array.dtype, np.floating):
+        return False  # Text or boolean values
+    return config.JSON_DECIMALS is not None and np.isfinite(array).all() and (
+        np.abs(array).max() * 10**config.JSON_DECIMALS < 2**62
+    )
+
+
+def _encode_array(array):
+    # Each value is laid out as a row of ascii bytes with brackets, sign,
+    # digits and separator at fixed columns, padded with zero bytes which
+    # are dropped at the end, so no value is formatted in python
+    decimals, values = 0, array.ravel()
+    if np.issubdtype(array.dtype, np.floating):
+        decimals = config.JSON_DECIMALS
+        scaled = np.round(np.abs(values.astype(np.float64)) * 10**decimals)
+        integer, fraction = np.divmod(scaled.astype(np.int64), 10**decimals)
+    else:  # Integers exact, float64 rounds values above 2**53
+        integer, fraction = np.abs(values.astype(np.int64)), 0
+    width = len(str(int(integer.max(initial=0))))
+    columns = 2 * array.ndim + width + decimals + 3
+    table = np.zeros((values.size, columns), np.uint8)
+    index = np.arange(values.size)
+    sizes = np.cumprod(array.shape[::-1])[::-1]  # Values per axis item
+    for column, size in enumerate(sizes):  # Open at first of each axis
+        table[index % size == 0, column] = ord("[")
+    column = array.ndim
+    table[(values < 0) & (integer + fraction > 0), column] = ord("-")
+    for column in range(column + width, column, -1):  # Skip leading zeros
+        keep = (integer > 0) | (column == array.ndim + width)
+        integer, digit = np.divmod(integer, 10)
+        table[:, column] = np.where(keep, digit + ord("0"), 0)
+    column = array.ndim + width + 1
+    if decimals:
+        table[:, column] = ord(".")
+        for column in range(column + decimals, column, -1):
+            fraction, digit = np.divmod(fraction, 10)
+            table[:, column] = digit + ord("0")
+        column = array.ndim + width + decimals + 2
+    for column, size in enumerate(sizes, start=column):  # Close at last
+        table[index % size == size - 1, column] = ord("]")
+    table[:-1, -1] = ord(",")  # Separator after all but the last value
+    return table[table != 0].tobytes()
+
+
 def pdf_response(result, **options):
-    """Converts the prediction or training results into pdf return format.
+    """Converts the prediction or training results into a pdf report.
+
+    The report starts with the request options and summary statistics of
+    all the result rows: class histogram and mean confidence of predictions
+    or last, minimum and maximum values of training metrics. Rows follow in
+    paginated tables of fixed-width text lines. Only config.PDF_MAX_ROWS
+    evenly spaced rows are listed for larger results, so the report time
+    does not grow with the number of rows.
 
     Arguments:
         result -- Result value from call, expected either dict or str
           (see https://docs.deep-hybrid-datacloud.eu/projects/deepaas/en/stable/user/v2-api.html).  # noqa
-        options -- Not used, added for illustration purpose.
+        options -- Request options to print on the report.
 
     Raises:
         RuntimeError: Unsupported response type.
@@ -62,22 +241,30 @@ def pdf_response(result, **options):
     logger.debug("Response result: %d", result)
     logger.debug("Response options: %d", options)
     try:
-        # 1. create BytesIO object
-        buffer = io.BytesIO()
-        buffer.name = "output.pdf"
-        # 2. write the output of the method in the buffer
-        #    For the proper PDF document, you may use:
-        #    * matplotlib for images
-        #    * fPDF2 for text documents (pip3 install fPDF2)
+        if not isinstance(result, (dict, np.ndarray)):
+            result = result.history  # Training results
+        arrays = {k: np.asarray(v) for k, v in _flatten(result).items()}
+        options = {k: v for k, v in options.items() if v is not None}
         pdf = FPDF()
+        pdf.set_font("courier", size=8)
         pdf.add_page()
-        pdf.set_font("helvetica", size=12)
-        # in this EXAMPLE we also add input parameters
-        print_out = {"input": str(options), "predictions": str(result)}
-        pdf.multi_cell(w=0, txt=str(print_out).replace(",", ",\n"))
-        pdf_output = pdf.output(dest="S")
-        buffer.write(pdf_output)
-        # 3. rewind buffer to the beginning
+        width = int(pdf.epw // pdf.get_string_width("0"))
+        header, lines, total = _report_table(arrays, width)
+        summary = [f"Options: {options}", *_report_summary(arrays)]
+        if len(lines) < total:
+            summary.append(f"Listing {len(lines)} of {total} rows sampled.")
+        for line in summary:
+            pdf.multi_cell(0, 4, line, new_x="LMARGIN", new_y="NEXT")
+        pdf.ln()
+        pdf.cell(0, 4, header, new_x="LMARGIN", new_y="NEXT")
+        for line in lines:
+            if pdf.will_page_break(4):  # Repeat header on each page
+                pdf.add_page()
+                pdf.cell(0, 4, header, new_x="LMARGIN", new_y="NEXT")
+            pdf.cell(0, 4, line, new_x="LMARGIN", new_y="NEXT")
+        buffer = io.BytesIO()
+        buffer.name = "output.pdf"
+        buffer.write(pdf.output())
         buffer.seek(0)
         return buffer
     except Exception as err:  # TODO: Fix to specific exception
@@ -85,7 +272,405 @@ def pdf_response(result, **options):
         raise RuntimeError("Unsupported response type") from err
 
 
+def _report_summary(arrays):
+    lines = [f"{k}: {v}" for k, v in arrays.items() if v.ndim == 0]
+    labels, confidence, classes = _report_labels(arrays)
+    if labels is None:  # Training metrics or values without classes
+        for key, value in arrays.items():
+            if value.ndim == 1 and np.issubdtype(value.dtype, np.number):
+                lines.append(
+                    f"{key}: last {value[-1]:.4f}, "
+                    f"min {value.min():.4f}, max {value.max():.4f}"
+                )
+        return lines
+    counts = np.bincount(labels, minlength=classes)
+    lines.append(f"Rows: {len(labels)}")
+    if confidence is None:
+        lines.append("Class      rows   share")
+        shares = counts / len(labels)
+        for label, (count, share) in enumerate(zip(counts, shares)):
+            lines.append(f"{label:>5} {count:>9} {share:>7.2%}")
+        return lines
+    confidence = confidence.astype(np.float64)
+    lines.append(f"Mean confidence: {confidence.mean():.4f}")
+    means = np.bincount(labels, confidence, classes) / np.maximum(counts, 1)
+    lines.append("Class      rows   share  confidence")
+    shares = counts / len(labels)
+    for label, row in enumerate(zip(counts, shares, means)):
+        lines.append(f"{label:>5} {row[0]:>9} {row[1]:>7.2%} {row[2]:>11.4f}")
+    return lines
+
+
+def _report_labels(arrays):
+    predictions = arrays.get("predictions")
+    if predictions is not None and predictions.ndim == 2:
+        if np.issubdtype(predictions.dtype, np.floating):
+            labels = np.argmax(predictions, axis=-1)
+            confidence = np.max(predictions, axis=-1)
+            return labels, confidence, predictions.shape[-1]
+    for key, labels in arrays.items():  # Results reduced with top_k
+        if key.rpartition("/")[2] != "labels" or labels.ndim == 0:
+            continue
+        probabilities = arrays.get(key[:-len("labels")] + "probabilities")
+        labels = labels.reshape(len(labels), -1)[:, 0].astype(np.intp)
+        if probabilities is not None:
+            probabilities = probabilities.reshape(len(labels), -1)[:, 0]
+        return labels, probabilities, int(labels.max(initial=0)) + 1
+    return None, None, 0
+
+
+def _report_table(arrays, width):
+    total = max((len(v) for v in arrays.values() if v.ndim), default=0)
+    index = np.arange(total)
+    if total > config.PDF_MAX_ROWS:  # Keep report time constant
+        index = np.linspace(0, total - 1, config.PDF_MAX_ROWS)
+        index = np.unique(index.round().astype(np.intp))
+    columns = [("row", index)]
+    if "predictions" in arrays:  # Top class of probabilities
+        labels, confidence, _ = _report_labels(arrays)
+        if confidence is not None:
+            columns.append(("label", labels[index]))
+            columns.append(("conf", confidence[index]))
+    for key, value in arrays.items():
+        if value.ndim == 0 or len(value) != total:
+            continue
+        name = key.rpartition("/")[2]
+        value = value[index].reshape(len(index), -1)
+        if not np.issubdtype(value.dtype, np.number):  # E.g. file names
+            columns.insert(1, (name, value[:, 0].astype("U24")))
+        elif value.shape[1] == 1:
+            columns.append((name, value[:, 0]))
+        else:  # One column per class, e.g. p0..p9 for predictions
+            columns.extend((f"{name[0]}{i}", x) for i, x in enumerate(value.T))
+    names, lines = [], None
+    for name, values in columns:
+        if np.issubdtype(values.dtype, np.floating):
+            values = np.char.mod("%.4f", values)
+        elif np.issubdtype(values.dtype, np.number):
+            values = np.char.mod("%d", values)
+        size = max(len(name), int(np.char.str_len(values).max(initial=0)))
+        if len(" ".join(names)) + size + 1 > width:
+            break  # Remaining columns do not fit in the page
+        values = np.char.rjust(values, size)
+        names.append(name.rjust(size))
+        if lines is not None:
+            values = np.char.add(np.char.add(lines, " "), values)
+        lines = values
+    return " ".join(names), lines.tolist(), total
+
+
+def npy_response(result, precision=None, **options):
+    """Converts the prediction results into NPY binary format.
+
+    The array is written in NumPy native format without converting values,
+    the output is byte-compatible with the NPY files written by the
+    predict_model script. Results without "predictions", such as top_k
+    labels and probabilities, are written as one structured array with a
+    field per key.
+
+    Arguments:
+        result -- Result array from call, or dictionary with the array at
+          "predictions" (e.g. ensembles or cascades) or with arrays of the
+          same number of rows (e.g. top_k).
+        precision -- Float dtype for the values, default result dtype.
+        options -- Not used, added for illustration purpose.
+
+    Raises:
+        RuntimeError: Unsupported response type.
+
+    Returns:
+        Converted result into npy buffer format.
+    """
+    logger.debug("Response result type: %d", type(result))
+    logger.debug("Response options: %d", options)
+    try:
+        if isinstance(result, dict) and "predictions" in result:
+            result = result["predictions"]
+        if isinstance(result, dict):  # E.g. top_k labels and probabilities
+            result = _structured(result, precision)
+        buffer = io.BytesIO()
+        buffer.name = "output.npy"
+        np.save(buffer, _as_precision(result, precision), allow_pickle=False)
+        buffer.seek(0)
+        return buffer
+    except (TypeError, ValueError) as err:
+        logger.warning("Error converting result to npy: %s", err)
+        raise RuntimeError("Unsupported response type") from err
+
+
+def npz_response(result, precision=None, **options):
+    """Converts the prediction or training results into NPZ binary format.
+
+    Arrays are stored with the result dictionary keys, nested keys joined
+    with "/", and plain arrays are stored as "predictions".
+
+    Arguments:
+        result -- Result value from call, expected either array or dict.
+        precision -- Float dtype for the values, default result dtype.
+        options -- Not used, added for illustration purpose.
+
+    Raises:
+        RuntimeError: Unsupported response type.
+
+    Returns:
+        Converted result into npz buffer format.
+    """
+    logger.debug("Response result type: %d", type(result))
+    logger.debug("Response options: %d", options)
+    try:
+        if not isinstance(result, (dict, np.ndarray)):
+            result = result.history  # Training results
+        arrays = {
+            key: _as_precision(value, precision)
+            for key, value in _flatten(result).items()
+        }
+        buffer = io.BytesIO()
+        buffer.name = "output.npz"
+        np.savez(buffer, **arrays)
+        buffer.seek(0)
+        return buffer
+    except (AttributeError, TypeError, ValueError) as err:
+        logger.warning("Error converting result to npz: %s", err)
+        raise RuntimeError("Unsupported response type") from err
+
+
+def ndjson_response(result, block_rows=None, **options):
+    """Converts the prediction or training results into ndjson format.
+
+    Each line is a json object with one row of the results and its "row"
+    index, or with a block of block_rows rows and their "rows" index range.
+    Values which are not per row (e.g. ensemble timings) are repeated in the
+    lines of each chunk, and training results are written as one line per
+    epoch. The next chunk is predicted on a separate thread while the lines
+    of the previous one are written, and the lines are written into a
+    temporary file instead of memory, so only one chunk is held at a time.
+    The file is returned opened, DEEPaaS returns it to the server process
+    by name and streams it from disk.
+
+    Arguments:
+        result -- Iterator of (first row, chunk result) tuples, such as
+          demo_advanced.predict_chunks, or a result value as for
+          json_response.
+        block_rows -- Number of rows per line, default one row per line.
+        options -- Not used, added for illustration purpose.
+
+    Returns:
+        Converted result into ndjson file format.
+    """
+    logger.debug("Response result type: %d", type(result))
+    logger.debug("Response options: %d", options)
+    if not isinstance(result, (dict, np.ndarray, Iterator)):
+        history = {"epoch": result.epoch, **result.history}  # Training
+        result = {k: np.asarray(v) for k, v in history.items()}
+    chunks = result if isinstance(result, Iterator) else iter([(0, result)])
+    file = tempfile.NamedTemporaryFile(suffix=".ndjson", delete=False)
+    try:
+        with file, futures.ThreadPoolExecutor(1, "ndjson") as executor:
+            chunk = next(chunks, None)
+            while chunk is not None:  # Predict next chunk while writing
+                task = executor.submit(next, chunks, None)
+                file.write(_ndjson_lines(*chunk, block_rows))
+                chunk = task.result()
+    except BaseException:  # Failed predictions leave no files
+        os.remove(file.name)
+        raise
+    return open(file.name, "rb")  # pylint: disable=consider-using-with
+
+
+def _ndjson_lines(start, result, block_rows):
+    lines = []
+    for rows, values in _row_blocks(result, block_rows):
+        if not isinstance(values, dict):
+            values = {"predictions": values}
+        if block_rows:
+            line = {"rows": [start + rows.start, start + rows.stop]}
+        else:
+            line = {"row": start + rows}
+        line.update(values)
+        lines.append(dumps(line) + b"\n")
+    return b"".join(lines)
+
+
+def _row_blocks(result, block_rows):
+    length = _rows(result)
+    if not block_rows:
+        for index in range(length):
+            yield index, _take(result, index)
+        return
+    for start in range(0, length, block_rows):
+        rows = slice(start, min(start + block_rows, length))
+        yield rows, _take(result, rows)
+
+
+def _rows(result):
+    if isinstance(result, dict):
+        return max((_rows(x) for x in result.values()), default=0)
+    if isinstance(result, np.ndarray) and result.ndim > 0:
+        return len(result)
+    return 0
+
+
+def _take(result, index):
+    if isinstance(result, dict):
+        return {k: _take(v, index) for k, v in result.items()}
+    if isinstance(result, np.ndarray) and result.ndim > 0:
+        return result[index]
+    return result  # Not per row values
+
+
+def encodings():
+    """Returns the supported content encodings in preference order."""
+    if zstandard is not None:
+        return ["zstd", "gzip"]
+    return ["gzip"]
+
+
+def compress(buffer, accept_encoding=None):
+    """Compresses a binary response buffer with the accepted encoding.
+
+    The encoding is negotiated from the Accept-Encoding request header. The
+    body is compressed in the worker calling the model, streamed in blocks
+    from the buffer into a temporary file, so neither the full body nor its
+    compressed copy are held in memory. Temporary files, compressed or not,
+    are returned as a FilePayload, which pickles by name to the DEEPaaS
+    server process and removes the file once opened there.
+
+    Arguments:
+        buffer -- BytesIO buffer or temporary file (e.g. ndjson) with the
+          response body, other response types are returned unmodified.
+        accept_encoding -- Accept-Encoding request header value.
+
+    Returns:
+        Payload with the Content-Encoding header, or the uncompressed body
+        if no encoding is accepted or the body is below the configured
+        COMPRESSION_MIN_BYTES.
+    """
+    if not isinstance(buffer, (io.BytesIO, io.BufferedReader)):  # Json
+        return buffer
+    encoding = negotiate(accept_encoding)
+    is_file = isinstance(buffer, io.BufferedReader)  # E.g. ndjson
+    if is_file:
+        size = os.fstat(buffer.fileno()).st_size - buffer.tell()
+    else:
+        size = buffer.getbuffer().nbytes - buffer.tell()
+    if encoding is None or size < config.COMPRESSION_MIN_BYTES:
+        if is_file:  # Removed once streamed
+            buffer.close()
+            return FilePayload(buffer.name)
+        return buffer
+    logger.debug("Compressing %s response bytes with %s", size, encoding)
+    file = tempfile.NamedTemporaryFile(suffix=f".{encoding}", delete=False)
+    try:
+        with buffer, file, _compressor(file, encoding) as writer:
+            shutil.copyfileobj(buffer, writer)
+    except BaseException:  # Failed compressions leave no files
+        os.remove(file.name)
+        raise
+    if is_file:  # Plain body no longer required
+        os.remove(buffer.name)
+    return FilePayload(file.name, encoding)
+
+
+class FilePayload(payload.BufferedReaderPayload):
+    """Payload streaming a temporary response file from disk.
+
+    The payload pickles by file name, so it can be returned from the pool
+    processes calling the model. The file is removed when the payload is
+    unpickled in the DEEPaaS server process, after opening it, so it is
+    released as soon as the response is streamed.
+
+    Arguments:
+        filename -- Path to the temporary file with the response body.
+        encoding -- Content-Encoding of the body, default not encoded.
+    """
+
+    def __init__(self, filename, encoding=None):
+        headers = {"Content-Encoding": encoding} if encoding else None
+        file = open(filename, "rb")  # pylint: disable=consider-using-with
+        super().__init__(file, headers=headers)
+        self.content_encoding = encoding
+
+    def __reduce__(self):
+        return _unpickled_file, (self._value.name, self.content_encoding)
+
+
+def _unpickled_file(filename, encoding):
+    response = FilePayload(filename, encoding)
+    os.remove(filename)  # Streamed from the opened file
+    return response
+
+
+def negotiate(accept_encoding):
+    """Selects the supported encoding with the highest quality value.
+
+    Arguments:
+        accept_encoding -- Accept-Encoding request header value.
+
+    Returns:
+        Encoding name, or None if no supported encoding is accepted.
+    """
+    qvalues = {}
+    for item in (accept_encoding or "").split(","):
+        coding, *params = [x.strip() for x in item.split(";")]
+        qvalues[coding.lower()] = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    qvalues[coding.lower()] = float(value)
+                except ValueError:
+                    qvalues[coding.lower()] = 0.0
+    default = qvalues.get("*", 0.0)
+    accepted = [x for x in encodings() if qvalues.get(x, default) > 0]
+    return max(accepted, key=lambda x: qvalues.get(x, default), default=None)
+
+
+def _compressor(file, encoding):
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(config.ZSTD_LEVEL)
+        return compressor.stream_writer(file, closefd=False)
+    # No file name nor time in header, same body always same bytes
+    return gzip.GzipFile("", "wb", config.GZIP_LEVEL, file, mtime=0)
+
+
+def _as_precision(value, precision):
+    array = np.asarray(value)
+    if precision is None or not np.issubdtype(array.dtype, np.floating):
+        return array
+    return array.astype(precision, copy=False)
+
+
+def _structured(result, precision):
+    arrays = {k: _as_precision(v, precision) for k, v in result.items()}
+    rows = {len(x) for x in arrays.values() if x.ndim}
+    if len(rows) != 1 or any(x.ndim == 0 for x in arrays.values()):
+        raise ValueError("Result arrays have different number of rows.")
+    dtype = [(k, v.dtype, v.shape[1:]) for k, v in arrays.items()]
+    output = np.empty(rows.pop(), dtype=dtype)
+    for key, value in arrays.items():
+        output[key] = value
+    return output
+
+
+def _flatten(result, prefix=""):
+    if not isinstance(result, dict):
+        return {prefix.rstrip("/") or "predictions": result}
+    arrays = {}
+    for key, value in result.items():
+        arrays.update(_flatten(value, prefix=f"{prefix}{key}/"))
+    return arrays
+
+
 content_types = {
     "application/json": json_response,
     "application/pdf": pdf_response,
+    "application/x-npy": npy_response,
+    "application/x-npz": npz_response,
+    "application/x-ndjson": ndjson_response,
 }
+
+# Content types of training results, DEEPaaS returns the training result
+# inside its json status document, so binary buffers cannot be returned
+train_content_types = [
+    "application/json",
+]
@@ -3,6 +3,8 @@
 import marshmallow
 from webargs import ValidationError, fields, validate
 
+import demo_advanced as aimodel
+
 from . import config, responses, utils
 
 
@@ -17,6 +19,19 @@ class ModelName(fields.String):
         return value
 
 
+class ModelVersion(fields.String):
+    """Field that takes a version number or a stage alias and validates
+    against the available stages at demo_advanced.registry.
+    """
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if value.isdigit() and int(value) > 0:
+            return int(value)
+        if value not in aimodel.registry.STAGES:
+            raise ValidationError(f"Version `{value}` is not valid.")
+        return value
+
+
 class Dataset(fields.String):
     """Field that takes a string and validates against current available
     data files at config.DATA_URI.
@@ -43,13 +58,34 @@ class PredArgsSchema(marshmallow.Schema):
         required=True,
     )
 
+    version = ModelVersion(
+        metadata={
+            "description": "Model version number or stage alias.",
+        },
+        required=False,
+    )
+
     input_file = fields.Field(
         metadata={
-            "description": "NPY file with np.arrays for predictions.",
+            "description": "NPY file, or zip/tar of images, to predict.",
             "type": "file",
             "location": "form",
         },
-        required=True,
+        required=False,
+    )
+
+    dataset = Dataset(
+        metadata={
+            "description": "Dataset name to predict instead of input_file.",
+        },
+        required=False,
+    )
+
+    array_name = fields.String(
+        metadata={
+            "description": "Array from dataset to predict, default x_train.",
+        },
+        required=False,
     )
 
     batch_size = fields.Integer(
@@ -68,6 +104,70 @@ class PredArgsSchema(marshmallow.Schema):
         validate=validate.Range(min=1),
     )
 
+    timeout = fields.Float(
+        metadata={
+            "description": "Seconds after which the prediction is dropped.",
+        },
+        required=False,
+        validate=validate.Range(min=0.0, min_inclusive=False),
+    )
+
+    cascade_model = ModelName(
+        metadata={
+            "description": "Expensive model for low confidence predictions.",
+        },
+        required=False,
+    )
+
+    threshold = fields.Float(
+        metadata={
+            "description": "Minimum confidence to skip the cascade model.",
+        },
+        required=False,
+        validate=validate.Range(min=0.0, max=1.0),
+    )
+
+    rule = fields.String(
+        metadata={
+            "description": "Rule to combine the outputs of ensemble models.",
+        },
+        required=False,
+        validate=validate.OneOf(aimodel.ensemble.RULES),
+    )
+
+    top_k = fields.Integer(
+        metadata={
+            "description": "Return only the k best classes, 1 for labels.",
+        },
+        required=False,
+        validate=validate.Range(min=1, max=aimodel.config.LABEL_DIMENSIONS),
+    )
+
+    precision = fields.String(
+        metadata={
+            "description": "Float type of values on npy and npz responses.",
+        },
+        required=False,
+        validate=validate.OneOf(["float16", "float32"]),
+    )
+
+    block_rows = fields.Integer(
+        metadata={
+            "description": "Rows per line on ndjson responses, default 1.",
+        },
+        required=False,
+        validate=validate.Range(min=1),
+    )
+
+    accept_encoding = fields.String(
+        data_key="Accept-Encoding",
+        metadata={
+            "description": "Compression accepted for binary responses.",
+            "location": "headers",
+        },
+        required=False,
+    )
+
     accept = fields.String(
         metadata={
             "description": "Return format for method response.",
@@ -100,6 +200,13 @@ class TrainArgsSchema(marshmallow.Schema):
         required=True,
     )
 
+    version = ModelVersion(
+        metadata={
+            "description": "Model version number or stage to train from.",
+        },
+        required=False,
+    )
+
     epochs = fields.Integer(
         metadata={
             "description": "Number of epochs to train the model.",
@@ -141,5 +248,5 @@ class TrainArgsSchema(marshmallow.Schema):
             "location": "headers",
         },
         required=True,
-        validate=validate.OneOf(list(responses.content_types)),
+        validate=validate.OneOf(responses.train_content_types),
     )
@@ -3,12 +3,62 @@
 import logging
 import subprocess  # nosec B404
 import sys
+from concurrent import futures
 from pathlib import Path
 
+from aiohttp import web
+
 from . import config
 
 logger = logging.getLogger(__name__)
 
+# Bounded executors to run model calls out of the event loop
+inference_executor = futures.ThreadPoolExecutor(
+    max_workers=config.INFERENCE_WORKERS,
+    thread_name_prefix="inference",
+)
+training_executor = futures.ThreadPoolExecutor(
+    max_workers=config.TRAINING_WORKERS,
+    thread_name_prefix="training",
+)
+
+
+class ServiceUnavailable(web.HTTPServiceUnavailable):
+    """HTTP 503 error asking the client to retry after some seconds.
+
+    DEEPaaS runs the API methods in pool processes and pickles their errors
+    back to the server process, so the error is rebuilt from its reason and
+    retry_after instead of the response arguments.
+
+    Arguments:
+        reason -- Text explaining why the service is unavailable.
+        retry_after -- Seconds the client should wait before retrying.
+    """
+
+    def __init__(self, reason, retry_after):
+        headers = {"Retry-After": str(retry_after)}
+        super().__init__(reason=reason, headers=headers)
+        self.retry_after = retry_after
+
+    def __reduce__(self):
+        return type(self), (self.reason, self.retry_after)
+
+
+class GatewayTimeout(web.HTTPGatewayTimeout):
+    """HTTP 504 error for requests dropped when their deadline passed.
+
+    Rebuilt from its reason when pickled, as ServiceUnavailable.
+
+    Arguments:
+        reason -- Text explaining where the deadline passed.
+    """
+
+    def __init__(self, reason):
+        super().__init__(reason=reason)
+
+    def __reduce__(self):
+        return type(self), (self.reason,)
+
 
 def ls_models():
     """Utility to return a list of models available in `models` folder.
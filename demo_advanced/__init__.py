@@ -15,68 +15,394 @@ test set.
 Based on "Deep learning on MNIST" at https://github.com/numpy/numpy-tutorials
 and "Tensorflow tutorials" https://www.tensorflow.org/tutorials/keras.
 """
+import functools
 import logging
-import pathlib
+import time
+from concurrent import futures
 
 import keras
 import numpy as np
 
-from demo_advanced import config
+from demo_advanced import (
+    admission,
+    batching,
+    cache,
+    cascade,
+    compiled,
+    config,
+    ensemble,
+    images,
+    inputs,
+    numpy_backend,
+    registry,
+    reporting,
+    results,
+    shadow,
+    sharding,
+    threads,
+)
 
 # Create logger for this module
 logger = logging.getLogger(__name__)
 
+# Thread pools and pinning must be set before TensorFlow initializes
+threads.configure()
 
-def warm():
+
+def warm(model_names=(), batch_sizes=config.WARM_BATCH_SIZES):
     """Function to run preparation phase before anything else can start.
 
+    Models are loaded in parallel into the model cache and a dummy batch of
+    zeros is predicted for each batch size so inference graphs are traced
+    before the first request arrives, using config.INFERENCE_BUCKETS instead
+    of batch_sizes when configured. Numpy exports are published to the
+    shared weights store when loaded, if configured, and shard worker
+    processes started so they preload the models.
+
+    Arguments:
+        model_names -- Model names to preload from config.MODELS_URI.
+        batch_sizes -- Dummy batch sizes to trace on each model.
+
     Returns:
         True if model is ready to use.
     """
     logger.info("Warming up the model...")
+    model_uris = []
+    with futures.ThreadPoolExecutor(config.WARM_WORKERS) as executor:
+        tasks = {
+            executor.submit(_warm_model, name, batch_sizes): name
+            for name in model_names
+        }
+        for task in futures.as_completed(tasks):
+            try:  # Missing stages or malformed ensembles fail per model
+                model_uri, elapsed = task.result()
+            except Exception as err:  # pylint: disable=broad-except
+                logger.warning("Model %s not warm: %s", tasks[task], err)
+                continue
+            if model_uri is not None:  # Ensembles members are warm as models
+                logger.info("Model %s warm in %.3fs", tasks[task], elapsed)
+                model_uris.append(model_uri)
+    if config.SHARD_MIN_ROWS > 0:  # Start workers after models published
+        logger.info("Starting shard workers with preloaded models")
+        sharding.get_executor(preload=model_uris)
     logger.info("Model is ready to use.")
     return True
 
 
-def predict(model_name, input_file, **options):
+def _warm_model(model_name, batch_sizes):
+    start = time.perf_counter()
+    model_uri = registry.resolve(model_name)
+    if ensemble.load_definition(model_uri) is not None:
+        return None, 0.0
+    model = cache.load_model(model_uri)
+    input_shape = getattr(model, "input_shape", None)
+    if not isinstance(input_shape, tuple) or None in input_shape[1:]:
+        input_shape = (None, *config.IMAGES_SHAPE)
+    for batch_size in config.INFERENCE_BUCKETS or batch_sizes:
+        dummy_data = np.zeros((batch_size, *input_shape[1:]), "float32")
+        compiled.predict(model, dummy_data, batch_size=batch_size)
+    return model_uri, time.perf_counter() - start
+
+
+def predict(
+    model_name,
+    input_file,
+    array_name="x_train",
+    deadline=None,
+    cascade_model=None,
+    threshold=config.CASCADE_THRESHOLD,
+    rule=None,
+    version=None,
+    **options,
+):
     """Performs predictions on data using a MNIST model.
 
     Arguments:
-        model_name -- Model name to use for predictions.
-        input_file -- NPY file with images equivalent to MNIST data.
+        model_name -- Model or ensemble name to use for predictions, or list
+          of model names to predict as a mean ensemble.
+        input_file -- NPY file with images equivalent to MNIST data, NPZ
+          dataset file containing the images in array_name, or zip or tar
+          archive of image files.
+        array_name -- Array to predict when input_file is a NPZ file.
+        deadline -- Value from time.monotonic after which the prediction
+          is dropped, default no deadline.
+        cascade_model -- Expensive model name to predict the rows where
+          model_name is not confident, default no cascade.
+        threshold -- Minimum top class probability to accept a row from
+          model_name when cascade_model is used.
+        rule -- Rule to combine ensemble outputs, default from definition.
+        version -- Model version number or stage, default config.MODEL_STAGE.
         options -- See tensorflow/keras predict documentation.
 
+    Input files are validated from the NPY header and memory-mapped, see
+    demo_advanced.inputs for the accepted data types. Images in archives
+    are decoded into one batch, see demo_advanced.images. When sharding is
+    enabled with config.SHARD_MIN_ROWS, large inputs are split across a pool
+    of processes. When micro-batching is enabled with config.BATCH_MAX_SIZE,
+    requests without options are joined with concurrent requests for the
+    same model. Results are cached by input content when configured, see
+    demo_advanced.results. Concurrent predictions per model are limited
+    when configured, see demo_advanced.admission. Models run through
+    compiled functions with fixed batch sizes when config.INFERENCE_BUCKETS
+    is configured, see demo_advanced.compiled. With cascade_model, only
+    low confidence rows are predicted again, see demo_advanced.cascade.
+    Ensemble members share the input data and run in parallel, see
+    demo_advanced.ensemble. Versioned models are resolved to immutable
+    versions, see demo_advanced.registry. A fraction of the predictions is
+    mirrored to a shadow model in background when config.SHADOW_RATE is
+    configured, see demo_advanced.shadow.
+
+    Raises:
+        OverloadError: Model has no capacity to queue the request.
+        DeadlineExceeded: Deadline passed before running the prediction.
+
     Returns:
-        Return value from tf/keras model predict.
+        Return value from tf/keras model predict, or dictionary with the
+        merged predictions and the escalated fraction for cascades, or
+        dictionary with the combined predictions and members timing for
+        ensembles. Results from image archives are dictionaries with the
+        predictions and the image file names at "files".
     """
-    model_uri = pathlib.Path(config.MODELS_URI, model_name)
-    logger.debug("Loading model from uri: %s", model_uri)
-    model = keras.models.load_model(model_uri)
     logger.debug("Loading data from input_file: %s", input_file)
-    input_data = np.load(input_file)
-    logger.debug("Predict with options: %s", options)
-    return model.predict(input_data, verbose="auto", **options)
+    names, input_data, input_source = _open_input(input_file, array_name)
+    target = _resolve(model_name, version, rule)
+    result = _predict_input(
+        model_name,
+        *target,
+        input_data=input_data,
+        input_source=input_source,
+        deadline=deadline,
+        cascade_model=cascade_model,
+        threshold=threshold,
+        **options,
+    )
+    reporting.publish(stats)  # Read by get_metadata in other processes
+    return _with_names(result, names)
+
+
+def predict_chunks(
+    model_name,
+    input_file,
+    chunk_rows=config.STREAM_CHUNK_ROWS,
+    array_name="x_train",
+    deadline=None,
+    cascade_model=None,
+    threshold=config.CASCADE_THRESHOLD,
+    rule=None,
+    version=None,
+    **options,
+):
+    """Performs predictions on consecutive chunks of input rows.
+
+    Predictions are made only when the next chunk is requested, so the
+    first results are available independently of the input size and only
+    one chunk of input and output is in memory at a time. The model version
+    is resolved once so all chunks are predicted by the same version, and
+    chunks are never split across shard processes.
+
+    Arguments:
+        model_name -- Model or ensemble name to use for predictions, or list
+          of model names to predict as a mean ensemble.
+        input_file -- NPY file with images equivalent to MNIST data, NPZ
+          dataset file containing the images in array_name, or zip or tar
+          archive of image files.
+        chunk_rows -- Number of input rows predicted per chunk.
+        options -- See predict for the rest of arguments.
+
+    Raises:
+        OverloadError: Model has no capacity to queue the request.
+        DeadlineExceeded: Deadline passed before running a chunk.
+
+    Yields:
+        Tuples with the first row index of the chunk and the chunk result,
+        see predict for the result types.
+    """
+    logger.debug("Loading data from input_file: %s", input_file)
+    names, input_data, _ = _open_input(input_file, array_name)
+    target = _resolve(model_name, version, rule)
+    for start in range(0, len(input_data), chunk_rows):
+        logger.debug("Predict chunk from row %s of %s", start, input_file)
+        rows = slice(start, start + chunk_rows)
+        result = _predict_input(
+            model_name,
+            *target,
+            input_data=input_data[rows],
+            input_source=None,  # Chunks are not sharded
+            deadline=deadline,
+            cascade_model=cascade_model,
+            threshold=threshold,
+            **options,
+        )
+        reporting.publish(stats)
+        chunk_names = None if names is None else names[rows]
+        yield start, _with_names(result, chunk_names)
+
 
+def _open_input(input_file, array_name):
+    if images.is_archive(input_file):  # Decoded in memory, not sharded
+        names, input_data = images.read_archive(input_file)
+        return names, input_data, None
+    input_data = inputs.open_array(input_file, array_name)
+    return None, input_data, (input_file, array_name)
 
-def train(model_name, input_file, **options):
+
+def _with_names(result, names):
+    if names is None:
+        return result
+    if isinstance(result, dict):
+        return {**result, "files": names}
+    return {"predictions": result, "files": names}
+
+
+def _resolve(model_name, version, rule):
+    if isinstance(model_name, (list, tuple)):
+        model_uri, definition = None, {"members": model_name}
+    else:
+        model_uri = registry.resolve(model_name, version)
+        definition = ensemble.load_definition(model_uri)
+    if definition is not None:
+        if rule is not None:  # Request overrides the definition rule
+            definition["rule"] = rule
+        definition = ensemble.validate(**definition)
+    return model_uri, definition
+
+
+def _predict_input(
+    model_name,
+    model_uri,
+    definition,
+    input_data,
+    input_source,
+    deadline,
+    cascade_model,
+    threshold,
+    **options,
+):
+    predict_fn = functools.partial(
+        _predict,
+        input_data=input_data,
+        input_source=input_source,
+        deadline=deadline,
+        **options,
+    )
+    if definition is None:
+        start = time.perf_counter()
+        result = predict_fn(model_uri)
+        elapsed = time.perf_counter() - start
+        shadow.evaluator.submit(
+            model_name, input_data, result, elapsed, model_uri=model_uri
+        )
+    else:
+        logger.debug("Predict using ensemble: %s", definition)
+        result = ensemble.predict(predict_fn, **definition)
+    if cascade_model is None:
+        return result
+    logger.debug("Cascade to %s below: %s", cascade_model, threshold)
+    ensembled = isinstance(result, dict)  # Keep ensemble members timing
+    predictions = result["predictions"] if ensembled else result
+    escalation = cascade.predict(
+        cascade_model, input_data, predictions, threshold, deadline
+    )
+    return {**result, **escalation} if ensembled else escalation
+
+
+def _predict(model_uri, input_data, input_source, deadline, **options):
+    logger.debug("Loading model from uri: %s", model_uri)
+    model = cache.load_model(model_uri)
+    sample_shape = inputs.sample_shape(model)
+    inputs.validate(input_data.shape, input_data.dtype, sample_shape)
+    result_key = results.make_key(model_uri, input_data, **options)
+    result = results.store.get(result_key)
+    if result is not None:
+        logger.debug("Returning cached result for: %s", result_key)
+        return result
+    with admission.admit(model_uri, deadline):
+        if input_source and sharding.enabled(len(input_data)):
+            logger.debug("Predict using process shards for: %s", model_uri)
+            shards_input = *input_source, len(input_data)
+            result = sharding.predict(model_uri, *shards_input, **options)
+        elif config.BATCH_MAX_SIZE and not options:
+            logger.debug("Predict using micro-batching for: %s", model_uri)
+            input_data = inputs.as_float32(input_data)
+            batcher = batching.get_batcher(model_uri)
+            result = batcher.predict(input_data, deadline)
+        else:
+            logger.debug("Predict with options: %s", options)
+            input_data = inputs.as_float32(input_data)
+            admission.check_deadline(deadline)
+            result = compiled.predict(model, input_data, "auto", **options)
+    results.store.put(result_key, result)
+    return result
+
+
+def train(model_name, input_file, version=None, **options):
     """Performs training on a model from raw MNIST input and target data.
 
     Arguments:
         model_name -- Model name to use for predictions.
         input_file -- NPZ file with training images and labels.
+        version -- Model version number or stage to start training from,
+          default config.MODEL_STAGE.
         options -- See tensorflow/keras fit documentation.
 
+    Models are trained on a private copy, so concurrent predictions keep
+    using the cached model. Versioned models are saved as a new version
+    pointed by the Staging alias, see demo_advanced.registry. Models in the
+    flat layout are saved in place and reloaded on the next prediction.
+
+    Raises:
+        ValueError: Model version is served with numpy, which cannot train.
+
     Returns:
         Return value from tf/keras model fit.
     """
-    model_uri = pathlib.Path(config.MODELS_URI, model_name)
-    logger.debug("Loading model from uri: %s", model_uri)
-    model = keras.models.load_model(model_uri)
+    model_uri = registry.resolve(model_name, version)
+    if numpy_backend.is_export(model_uri):
+        raise ValueError(f"Model `{model_name}` is a numpy export.")
     logger.debug("Loading data from input_file: %s", input_file)
     with np.load(input_file) as input_data:
         train_data = input_data["x_train"], input_data["y_train"]
+    if registry.versions(model_name):  # Served versions stay untouched
+        logger.debug("Loading model copy from uri: %s", model_uri)
+        model = keras.models.load_model(model_uri)
+        logger.debug("Training with options: %s", options)
+        result = model.fit(*train_data, verbose="auto", **options)
+        new_version = registry.publish(model_name, model)
+        logger.debug("Trained model saved as version: %s", new_version)
+        return result
+    logger.debug("Loading model copy from uri: %s", model_uri)
+    model = keras.models.load_model(model_uri)  # Cached model keeps serving
     logger.debug("Training with options: %s", options)
     result = model.fit(*train_data, verbose="auto", **options)
-    logger.debug("Updating model with training: %s", model_uri)
-    model.save(model_uri)
+    try:
+        logger.debug("Updating model with training: %s", model_uri)
+        model.save(model_uri)
+    finally:  # Force reload on next call, model might be partially saved
+        cache.models.invalidate(model_uri)
     return result
+
+
+def stats():
+    """Returns statistics from the model serving features.
+
+    Statistics are kept per process, so they only count the predictions
+    made by the calling process. Predicting processes write them where
+    get_metadata collects them when configured, see
+    demo_advanced.reporting.
+
+    Returns:
+        Dictionary with model cache, micro-batching, result cache,
+        admission, compiled functions, cascade, served versions, thread
+        settings and shadow evaluation statistics.
+    """
+    return {
+        "model_cache": cache.models.stats(),
+        "batching": batching.stats(),
+        "result_cache": results.store.stats(),
+        "admission": admission.stats(),
+        "compiled": compiled.stats(),
+        "cascade": cascade.counters.stats(),
+        "registry": registry.serving.stats(),
+        "threads": threads.settings,
+        "shadow": shadow.evaluator.stats(),
+    }
@@ -0,0 +1,148 @@
+"""Module to limit concurrent predictions per model and drop late requests.
+
+Without limits, traffic spikes queue an unbounded amount of work and the
+latency of every request grows until clients time out, while the server
+still computes results nobody waits for. When enabled, each model accepts
+`ADMISSION_CONCURRENCY` predictions at a time and up to `ADMISSION_QUEUE`
+waiting requests; further requests fail fast with `OverloadError`.
+
+Requests can carry a deadline (a `time.monotonic` value). Requests still
+waiting when their deadline passes fail with `DeadlineExceeded` and never
+reach the model.
+
+Limits and queues are kept per process, so they bound concurrent callers
+within one process, such as `api.predict_async` calls or threads calling
+`demo_advanced.predict`. `deepaas-run` serves each request in a pool
+process that holds one request at a time, so the queue cap never triggers
+there. Requests wait instead in DEEPaaS for a free pool process, and that
+wait is not bounded by this module. The api module maps `OverloadError` to
+an HTTP 503 response with a `Retry-After` header and `DeadlineExceeded`
+to an HTTP 504 response. Deadlines set with the predict `timeout` option
+count from when the pool process starts the request.
+"""
+import collections
+import contextlib
+import logging
+import threading
+import time
+
+from demo_advanced import config
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+
+class OverloadError(RuntimeError):
+    """Raised when a model has no capacity to queue more requests."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request deadline passes before it is processed."""
+
+
+def check_deadline(deadline):
+    """Raises DeadlineExceeded if the deadline has already passed.
+
+    Arguments:
+        deadline -- Value from time.monotonic, None for no deadline.
+    """
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded("Request deadline exceeded before predict.")
+
+
+class Admission:
+    """Concurrency limit with a bounded waiting queue for a model.
+
+    Arguments:
+        concurrency -- Maximum number of requests processed at a time.
+        max_queue -- Maximum number of requests waiting for a slot.
+    """
+
+    def __init__(self, concurrency, max_queue):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self.active = self.waiting = 0
+        self.rejected = self.expired = 0
+
+    @contextlib.contextmanager
+    def admit(self, deadline=None):
+        """Context manager that holds a slot while processing a request.
+
+        Arguments:
+            deadline -- Value from time.monotonic, None for no deadline.
+
+        Raises:
+            OverloadError: The waiting queue is full.
+            DeadlineExceeded: Deadline passed before getting a slot.
+        """
+        with self._lock:
+            if self.active >= self.concurrency and (
+                self.waiting >= self.max_queue
+            ):
+                self.rejected += 1
+                raise OverloadError("Model overloaded, try again later.")
+            self.waiting += 1
+        try:
+            if deadline is None:
+                acquired = self._slots.acquire()
+            else:
+                timeout = max(deadline - time.monotonic(), 0)
+                acquired = self._slots.acquire(timeout=timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        if not acquired:
+            with self._lock:
+                self.expired += 1
+            raise DeadlineExceeded("Request deadline exceeded in queue.")
+        with self._lock:
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Returns a dictionary with the admission statistics."""
+        with self._lock:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "rejected": self.rejected,
+                "expired": self.expired,
+            }
+
+
+# Process-wide admission controllers, one per model uri
+controllers = collections.defaultdict(
+    lambda: Admission(config.ADMISSION_CONCURRENCY, config.ADMISSION_QUEUE)
+)
+_controllers_lock = threading.Lock()
+
+
+def admit(model_uri, deadline=None):
+    """Returns the admission context for a prediction on model_uri.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+        deadline -- Value from time.monotonic, None for no deadline.
+
+    Returns:
+        Context manager holding a model slot, no limits if disabled.
+    """
+    check_deadline(deadline)
+    if config.ADMISSION_CONCURRENCY <= 0:
+        return contextlib.nullcontext()
+    with _controllers_lock:
+        controller = controllers[str(model_uri)]
+    return controller.admit(deadline)
+
+
+def stats():
+    """Returns a dictionary with the admission statistics per model."""
+    with _controllers_lock:
+        return {key: x.stats() for key, x in controllers.items()}
@@ -0,0 +1,171 @@
+"""Module to coalesce concurrent prediction requests into single batches.
+
+Small concurrent requests for the same model waste most of the time on the
+per-call overhead of `model.predict`. When enabled, requests are queued per
+model and a background thread joins them into one batch, bounded by
+`BATCH_MAX_SIZE` rows and by `BATCH_MAX_WAIT` seconds since the first queued
+request. The batch is predicted in a single forward pass and the output rows
+are scattered back to each caller.
+
+Requests are only joined within one process. DEEPaaS runs each `predict`
+call in a pool process that serves one request at a time, so there is
+nothing to join there. Batching applies to in-process callers that predict
+concurrently, such as `api.predict_async` calls on one event loop or
+threads calling `demo_advanced.predict` directly.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent import futures
+
+import numpy as np
+
+from demo_advanced import admission, cache, compiled, config
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Queue that predicts concurrent requests for a model as one batch.
+
+    Arguments:
+        predict_fn -- Function to call with the concatenated batch.
+        max_batch_size -- Maximum number of rows to join in one batch.
+        max_wait -- Maximum seconds to wait for rows after first request.
+    """
+
+    def __init__(self, predict_fn, max_batch_size, max_wait):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = None
+        self._carry = None  # Request left out of the previous batch
+        self._lock = threading.Lock()
+        self.batches = self.requests = self.rows = 0
+        self.wait_time = 0.0
+
+    def predict(self, input_data, deadline=None):
+        """Queues input_data for prediction and waits for the result.
+
+        Arguments:
+            input_data -- Array with input rows to predict.
+            deadline -- Value from time.monotonic, requests still queued
+              after the deadline are dropped.
+
+        Returns:
+            Array with the prediction rows for input_data.
+        """
+        future = futures.Future()
+        future.deadline = deadline
+        self._queue.put((input_data, future, time.perf_counter()))
+        with self._lock:  # Start worker on first request
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+        return future.result()
+
+    def stats(self):
+        """Returns a dictionary with the batching statistics."""
+        batches = max(self.batches, 1)
+        return {
+            "queue_depth": self._queue.qsize() + bool(self._carry),
+            "batches": self.batches,
+            "requests": self.requests,
+            "batch_fill_ratio": self.rows / batches / self.max_batch_size,
+            "mean_wait_time": self.wait_time / max(self.requests, 1),
+        }
+
+    def _run(self):
+        while True:
+            requests = self._drop_expired(self._collect())
+            if not requests:
+                continue
+            inputs = [input_data for input_data, _, _ in requests]
+            try:
+                result = self.predict_fn(np.concatenate(inputs))
+            except Exception as err:  # pylint: disable=broad-except
+                for _, future, _ in requests:
+                    future.set_exception(err)
+                continue
+            sections = np.cumsum([len(x) for x in inputs])[:-1]
+            for (_, future, _), rows in zip(
+                requests, np.split(result, sections)
+            ):
+                future.set_result(rows)
+
+    @staticmethod
+    def _drop_expired(requests):
+        pending = []
+        for request in requests:
+            try:
+                admission.check_deadline(request[1].deadline)
+                pending.append(request)
+            except admission.DeadlineExceeded as err:
+                request[1].set_exception(err)
+        return pending
+
+    def _collect(self):
+        requests = [self._carry or self._queue.get()]
+        self._carry = None
+        size = len(requests[0][0])
+        deadline = requests[0][2] + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if size + len(request[0]) > self.max_batch_size:
+                self._carry = request  # Keep for the next batch
+                break
+            requests.append(request)
+            size += len(request[0])
+        now = time.perf_counter()
+        self.batches += 1
+        self.requests += len(requests)
+        self.rows += size
+        self.wait_time += sum(now - enqueued for _, _, enqueued in requests)
+        logger.debug("Batch of %d requests with %d rows", len(requests), size)
+        return requests
+
+
+# Process-wide batchers, one per model uri
+batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(model_uri):
+    """Returns the batcher for the model at model_uri.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+
+    Returns:
+        MicroBatcher instance for the model.
+    """
+    key = str(model_uri)
+    with _batchers_lock:
+        if key not in batchers:
+            batchers[key] = MicroBatcher(
+                predict_fn=lambda x: _predict(model_uri, x),
+                max_batch_size=config.BATCH_MAX_SIZE,
+                max_wait=config.BATCH_MAX_WAIT,
+            )
+        return batchers[key]
+
+
+def stats():
+    """Returns a dictionary with the batching statistics per model."""
+    with _batchers_lock:
+        return {key: batcher.stats() for key, batcher in batchers.items()}
+
+
+def _predict(model_uri, input_data):
+    model = cache.load_model(model_uri)
+    batch_size = len(input_data)  # Single forward pass
+    return compiled.predict(model, input_data, batch_size=batch_size)
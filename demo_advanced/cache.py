@@ -0,0 +1,187 @@
+"""Module to keep loaded models resident in memory between calls.
+
+Loading a model from `config.MODELS_URI` deserializes the full model from
+disk, which for small inputs takes far longer than the prediction itself.
+This module provides a process-wide LRU cache keyed by the model path and
+its on-disk modification time, so a model saved again (e.g. after training)
+is automatically reloaded on the next call.
+
+The cache is bounded by number of entries and by an estimated memory budget
+in bytes, see `MODEL_CACHE_SIZE` and `MODEL_CACHE_BYTES` at config.
+"""
+import collections
+import logging
+import pathlib
+import threading
+
+import keras
+
+from demo_advanced import config, numpy_backend, shared
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+
+def model_version(model_uri):
+    """Returns the on-disk modification time of a model.
+
+    Models saved as folders (e.g. SavedModel) are updated file by file, so
+    the latest modification time of all the folder contents is used.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+
+    Returns:
+        Integer with the latest modification time in nanoseconds.
+    """
+    model_uri = pathlib.Path(model_uri)
+    paths = [model_uri, *model_uri.rglob("*")]
+    return max(path.stat().st_mtime_ns for path in paths)
+
+
+def model_nbytes(model_uri):
+    """Returns the estimated memory size of a model using its disk size.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+
+    Returns:
+        Integer with the number of bytes used by the model files.
+    """
+    model_uri = pathlib.Path(model_uri)
+    paths = [model_uri, *model_uri.rglob("*")]
+    return sum(path.stat().st_size for path in paths if path.is_file())
+
+
+class ModelCache:
+    """Thread safe LRU cache of loaded models bounded by count and bytes.
+
+    Arguments:
+        maxsize -- Maximum number of models to keep loaded.
+        maxbytes -- Maximum estimated memory in bytes for all models.
+    """
+
+    def __init__(self, maxsize, maxbytes):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._entries = collections.OrderedDict()
+        self._lock = threading.RLock()
+        self._loading = collections.defaultdict(threading.Lock)
+        self.hits = self.misses = 0
+
+    @property
+    def nbytes(self):
+        """Estimated memory in bytes used by the cached models."""
+        with self._lock:
+            return sum(nbytes for _, _, nbytes in self._entries.values())
+
+    def __contains__(self, model_uri):
+        key = str(pathlib.Path(model_uri).absolute())
+        with self._lock:
+            return key in self._entries
+
+    def get(self, model_uri):
+        """Returns the model at model_uri, loading it only when required.
+
+        Arguments:
+            model_uri -- Path to the model file or folder.
+
+        Returns:
+            Loaded keras model.
+        """
+        key = str(pathlib.Path(model_uri).absolute())
+        version = model_version(key)
+        with self._lock:
+            if self._lookup(key, version):
+                return self._entries[key][1]
+        with self._loading[key]:  # Only one thread loads each model
+            with self._lock:
+                if self._lookup(key, version):
+                    return self._entries[key][1]
+                self.misses += 1
+            logger.debug("Loading model from uri: %s", key)
+            model = _load(key, version)
+            self.put(key, model, version=version)
+            return model
+
+    def put(self, model_uri, model, version=None):
+        """Stores a loaded model, evicting least recently used models.
+
+        Arguments:
+            model_uri -- Path to the model file or folder.
+            model -- Loaded keras model to store.
+            version -- Model modification time, default reads from disk.
+        """
+        key = str(pathlib.Path(model_uri).absolute())
+        version = model_version(key) if version is None else version
+        nbytes = model_nbytes(key)
+        if nbytes > self.maxbytes or self.maxsize <= 0:
+            logger.debug("Model %s not cached, exceeds limits", key)
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (version, model, nbytes)
+            while len(self._entries) > self.maxsize or (
+                self.nbytes > self.maxbytes
+            ):
+                evicted, _ = self._entries.popitem(last=False)
+                logger.debug("Evicted model from cache: %s", evicted)
+
+    def invalidate(self, model_uri=None):
+        """Removes a model from the cache, or all models if not indicated.
+
+        Arguments:
+            model_uri -- Path to the model file or folder, default all.
+        """
+        with self._lock:
+            if model_uri is None:
+                self._entries.clear()
+                return
+            key = str(pathlib.Path(model_uri).absolute())
+            self._entries.pop(key, None)
+
+    def stats(self):
+        """Returns a dictionary with the cache statistics."""
+        with self._lock:
+            return {
+                "models": list(self._entries),
+                "nbytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _lookup(self, key, version):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if entry[0] != version:
+            logger.debug("Model %s modified on disk, reloading", key)
+            del self._entries[key]
+            return False
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True
+
+
+# Process-wide cache used by demo_advanced functions
+models = ModelCache(config.MODEL_CACHE_SIZE, config.MODEL_CACHE_BYTES)
+
+
+def load_model(model_uri):
+    """Returns a keras or numpy model from the process-wide cache.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+
+    Returns:
+        Loaded keras model, or NumpyModel for numpy exports.
+    """
+    return models.get(model_uri)
+
+
+def _load(model_uri, version):
+    if not numpy_backend.is_export(model_uri):
+        return keras.models.load_model(model_uri)
+    if shared.enabled():  # Weights mapped once for all processes
+        return shared.load_model(model_uri, version)
+    return numpy_backend.load_model(model_uri)
@@ -0,0 +1,94 @@
+"""Module to escalate low confidence predictions to a more expensive model.
+
+Most inputs are easy to classify, yet every request pays for the most
+expensive model. In a cascade, a cheap model predicts the whole batch and
+only the rows whose top class probability is below a threshold are
+predicted again with the expensive model. The escalated results replace
+the cheap ones in the original row order, and the fraction of escalated
+rows is reported with the predictions so the threshold can be tuned to
+trade accuracy for CPU time.
+"""
+import logging
+import threading
+
+import numpy as np
+
+from demo_advanced import admission, cache, compiled, inputs, registry
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+
+def escalated_rows(result, threshold):
+    """Returns the indexes of rows with top probability below threshold.
+
+    Arguments:
+        result -- Array with class probabilities for each row.
+        threshold -- Minimum top class probability to accept a row.
+    """
+    return np.flatnonzero(np.max(result, axis=-1) < threshold)
+
+
+def predict(model_name, input_data, result, threshold, deadline=None):
+    """Replaces low confidence rows with predictions from model_name.
+
+    Arguments:
+        model_name -- Expensive model name to predict escalated rows.
+        input_data -- Array with the input rows, can be memory-mapped.
+        result -- Array with the cheap model predictions for input_data.
+        threshold -- Minimum top class probability to accept a row.
+        deadline -- Value from time.monotonic, None for no deadline.
+
+    Raises:
+        ValueError: Input shape not supported by model_name.
+
+    Returns:
+        Dictionary with the merged predictions and the escalated fraction.
+    """
+    escalate = escalated_rows(result, threshold)
+    logger.debug("Escalating %s rows to model %s", escalate.size, model_name)
+    if escalate.size:
+        model_uri = registry.resolve(model_name)
+        model = cache.load_model(model_uri)
+        sample_shape = inputs.sample_shape(model)
+        inputs.validate(input_data.shape, input_data.dtype, sample_shape)
+        with admission.admit(model_uri, deadline):
+            escalated_data = inputs.as_float32(input_data[escalate])
+            admission.check_deadline(deadline)
+            result = np.array(result)  # Cached results are read-only
+            result[escalate] = compiled.predict(model, escalated_data)
+    counters.update(len(result), escalate.size)
+    return {"predictions": result, "escalated": escalate.size / len(result)}
+
+
+class Counters:
+    """Thread safe counters of the cascade predictions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = self.rows = self.escalated = 0
+
+    def update(self, rows, escalated):
+        """Adds a cascade prediction to the counters.
+
+        Arguments:
+            rows -- Number of rows predicted by the cheap model.
+            escalated -- Number of rows predicted by the expensive model.
+        """
+        with self._lock:
+            self.requests += 1
+            self.rows += rows
+            self.escalated += escalated
+
+    def stats(self):
+        """Returns a dictionary with the cascade statistics."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "rows": self.rows,
+                "escalated_ratio": self.escalated / max(self.rows, 1),
+            }
+
+
+# Process-wide counters used by demo_advanced.predict
+counters = Counters()
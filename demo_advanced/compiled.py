@@ -0,0 +1,122 @@
+"""Module to run models through compiled functions with fixed batch shapes.
+
+Calling `model.predict` with new input lengths or batch sizes can trace a
+new graph, which shows as random latency spikes. When `INFERENCE_BUCKETS`
+is configured, models run through a `tf.function` that only receives the
+configured batch sizes: inputs are split in chunks of the largest bucket,
+each chunk is padded with zeros up to the nearest bucket and the real rows
+are sliced back from the output. Compiled functions are kept per model and
+reused across requests, so each bucket is traced once per loaded model.
+"""
+import bisect
+import logging
+import threading
+import weakref
+
+import numpy as np
+import tensorflow as tf
+
+from demo_advanced import config, numpy_backend
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+
+class BucketedModel:
+    """Wrapper to predict with a keras model using fixed batch shapes.
+
+    Arguments:
+        model -- Loaded keras model to wrap.
+        buckets -- Batch sizes the compiled function is called with.
+    """
+
+    def __init__(self, model, buckets):
+        self._model = weakref.ref(model)  # Wrappers must not keep models
+        self.buckets = sorted(buckets)
+        self.traces = self.calls = 0
+        self._function = tf.function(self._forward, reduce_retracing=False)
+
+    def predict(self, input_data, batch_size=None, steps=None):
+        """Performs predictions padding inputs to the batch buckets.
+
+        Arguments:
+            input_data -- Array with the input rows to predict.
+            batch_size -- Maximum rows per call, default largest bucket.
+            steps -- Number of batches to predict, default all rows.
+
+        Returns:
+            Numpy array with the predictions for each input row.
+        """
+        size = min(batch_size or self.buckets[-1], self.buckets[-1])
+        rows = len(input_data) if steps is None else steps * size
+        outputs = [
+            self._predict_chunk(input_data[start:][:size])
+            for start in range(0, min(rows, len(input_data)), size)
+        ]
+        return np.concatenate(outputs)
+
+    def stats(self):
+        """Returns a dictionary with the compiled function statistics."""
+        return {
+            "buckets": self.buckets,
+            "traces": self.traces,
+            "calls": self.calls,
+        }
+
+    def _predict_chunk(self, chunk):
+        rows = len(chunk)
+        bucket = self.buckets[bisect.bisect_left(self.buckets, rows)]
+        padded = np.zeros((bucket, *chunk.shape[1:]), np.float32)
+        padded[:rows] = chunk
+        self.calls += 1
+        return self._function(padded).numpy()[:rows]
+
+    def _forward(self, input_data):
+        self.traces += 1  # Python side effect only runs while tracing
+        logger.debug("Tracing model for shape %s", input_data.shape)
+        return self._model()(input_data, training=False)
+
+
+# Process-wide wrappers, released together with their models
+wrappers = weakref.WeakKeyDictionary()
+_wrappers_lock = threading.Lock()
+
+
+def get_wrapper(model):
+    """Returns the bucketed wrapper for a loaded model.
+
+    Arguments:
+        model -- Loaded keras model.
+
+    Returns:
+        BucketedModel instance for the model.
+    """
+    with _wrappers_lock:
+        if model not in wrappers:
+            wrappers[model] = BucketedModel(model, config.INFERENCE_BUCKETS)
+        return wrappers[model]
+
+
+def predict(model, input_data, verbose=0, **options):
+    """Performs predictions with the model using buckets if configured.
+
+    Arguments:
+        model -- Loaded keras model.
+        input_data -- Array with the input rows to predict.
+        verbose -- Verbosity used when buckets are not configured.
+        options -- See tensorflow/keras predict documentation.
+
+    Returns:
+        Numpy array with the predictions for each input row.
+    """
+    if isinstance(model, numpy_backend.NumpyModel):  # Nothing to trace
+        return model.predict(input_data, **options)
+    if not config.INFERENCE_BUCKETS:
+        return model.predict(input_data, verbose=verbose, **options)
+    return get_wrapper(model).predict(input_data, **options)
+
+
+def stats():
+    """Returns a dictionary with the compiled functions statistics."""
+    with _wrappers_lock:
+        return {x.name: w.stats() for x, w in wrappers.items()}
@@ -25,3 +25,84 @@ DATA_URI = os.getenv("DEMO_ADVANCED_DATA_URI", "data")
 LABEL_DIMENSIONS = int(os.getenv("DEMO_ADVANCED_LABEL_DIMENSIONS", "10"))
 IMAGE_SIZE = int(os.getenv("DEMO_ADVANCED_IMAGE_SIZE", default="28"))
 IMAGES_SHAPE = (IMAGE_SIZE, IMAGE_SIZE)
+
+# Configuration of model cache to keep loaded models in memory
+MODEL_CACHE_SIZE = int(os.getenv("DEMO_ADVANCED_MODEL_CACHE_SIZE", "8"))
+MODEL_CACHE_BYTES = int(
+    os.getenv("DEMO_ADVANCED_MODEL_CACHE_BYTES", default="1073741824")
+)
+
+# Configuration of warm up phase before serving models
+WARM_WORKERS = int(os.getenv("DEMO_ADVANCED_WARM_WORKERS", "4"))
+WARM_BATCH_SIZES = os.getenv("DEMO_ADVANCED_WARM_BATCH_SIZES", "1,32")
+WARM_BATCH_SIZES = tuple(int(x) for x in WARM_BATCH_SIZES.split(",") if x)
+
+# Configuration of micro-batching for concurrent predictions, 0 disables
+BATCH_MAX_SIZE = int(os.getenv("DEMO_ADVANCED_BATCH_MAX_SIZE", "0"))
+BATCH_MAX_WAIT = float(os.getenv("DEMO_ADVANCED_BATCH_MAX_WAIT", "0.005"))
+
+# Configuration of predictions split in shards across processes
+SHARD_MIN_ROWS = int(os.getenv("DEMO_ADVANCED_SHARD_MIN_ROWS", "0"))
+SHARD_SIZE = int(os.getenv("DEMO_ADVANCED_SHARD_SIZE", "0"))
+SHARD_WORKERS = os.getenv("DEMO_ADVANCED_SHARD_WORKERS", "")
+SHARD_WORKERS = int(SHARD_WORKERS) if SHARD_WORKERS else os.cpu_count() or 1
+
+# Configuration of weights shared between worker processes, empty disables
+SHARED_WEIGHTS_URI = os.getenv("DEMO_ADVANCED_SHARED_WEIGHTS_URI", "")
+
+# Configuration of prediction results cache, 0 and empty disable the tiers
+RESULT_CACHE_BYTES = int(os.getenv("DEMO_ADVANCED_RESULT_CACHE_BYTES", "0"))
+RESULT_CACHE_URI = os.getenv("DEMO_ADVANCED_RESULT_CACHE_URI", "")
+RESULT_CACHE_DISK_BYTES = int(
+    os.getenv("DEMO_ADVANCED_RESULT_CACHE_DISK_BYTES", default="1073741824")
+)
+
+# Configuration of admission control per model, 0 concurrency disables
+ADMISSION_CONCURRENCY = int(
+    os.getenv("DEMO_ADVANCED_ADMISSION_CONCURRENCY", default="0")
+)
+ADMISSION_QUEUE = int(os.getenv("DEMO_ADVANCED_ADMISSION_QUEUE", "16"))
+
+# Configuration of batch sizes for compiled inference, empty disables
+INFERENCE_BUCKETS = os.getenv("DEMO_ADVANCED_INFERENCE_BUCKETS", "")
+INFERENCE_BUCKETS = tuple(int(x) for x in INFERENCE_BUCKETS.split(",") if x)
+
+# Minimum top class probability to accept cheap model rows in cascades
+CASCADE_THRESHOLD = float(os.getenv("DEMO_ADVANCED_CASCADE_THRESHOLD", "0.9"))
+
+# Configuration of threads to predict ensemble members in parallel
+ENSEMBLE_WORKERS = int(os.getenv("DEMO_ADVANCED_ENSEMBLE_WORKERS", "4"))
+
+# Stage alias used when predictions do not request a model version
+MODEL_STAGE = os.getenv("DEMO_ADVANCED_MODEL_STAGE", "Production")
+
+# Configuration of TensorFlow thread pools per process, 0 uses TF defaults
+INTRA_OP_THREADS = int(os.getenv("DEMO_ADVANCED_INTRA_OP_THREADS", "0"))
+INTER_OP_THREADS = int(os.getenv("DEMO_ADVANCED_INTER_OP_THREADS", "0"))
+
+# Configuration of process cpu pinning, empty disables, "auto" uses topology
+CPU_AFFINITY = os.getenv("DEMO_ADVANCED_CPU_AFFINITY", "")
+HOST_WORKERS = int(os.getenv("DEMO_ADVANCED_HOST_WORKERS", "1"))
+WORKER_INDEX = os.getenv("DEMO_ADVANCED_WORKER_INDEX", "")
+WORKER_INDEX = int(WORKER_INDEX) if WORKER_INDEX else None
+
+# Configuration of shadow evaluation, 0 rate disables, empty model mirrors
+# to the same model name using SHADOW_VERSION
+SHADOW_RATE = float(os.getenv("DEMO_ADVANCED_SHADOW_RATE", "0"))
+SHADOW_MODEL = os.getenv("DEMO_ADVANCED_SHADOW_MODEL", "")
+SHADOW_VERSION = os.getenv("DEMO_ADVANCED_SHADOW_VERSION", "Staging")
+SHADOW_QUEUE = int(os.getenv("DEMO_ADVANCED_SHADOW_QUEUE", "64"))
+
+# Configuration of worker statistics shared with get_metadata, empty
+# disables, see demo_advanced.reporting
+STATS_URI = os.getenv("DEMO_ADVANCED_STATS_URI", "")
+STATS_INTERVAL = float(os.getenv("DEMO_ADVANCED_STATS_INTERVAL", "1.0"))
+
+# Input rows predicted per chunk on streamed predictions
+STREAM_CHUNK_ROWS = int(os.getenv("DEMO_ADVANCED_STREAM_CHUNK_ROWS", "256"))
+
+# Configuration of image archives decoding for predictions
+DECODE_WORKERS = int(os.getenv("DEMO_ADVANCED_DECODE_WORKERS", "4"))
+IMAGE_MAX_BYTES = int(os.getenv("DEMO_ADVANCED_IMAGE_MAX_BYTES", "16777216"))
+IMAGE_MAX_SIDE = os.getenv("DEMO_ADVANCED_IMAGE_MAX_SIDE", "")
+IMAGE_MAX_SIDE = int(IMAGE_MAX_SIDE) if IMAGE_MAX_SIDE else 128 * IMAGE_SIZE
@@ -0,0 +1,124 @@
+"""Module to predict with several models and combine their outputs.
+
+Calling predict once per model repeats the upload, input loading and
+response serialization for each of them. An ensemble feeds the same input
+data to all member models, in parallel threads, and combines the outputs:
+
+- `mean` averages the member probabilities.
+- `weighted` averages the member probabilities using the weights.
+- `vote` returns the fraction of members voting for each class.
+
+Ensembles are defined as folders in `config.MODELS_URI` containing an
+`ensemble.json` file, for example:
+```json
+{"members": ["convolution", "pipeline"], "rule": "vote"}
+```
+"""
+import json
+import logging
+import pathlib
+import time
+from concurrent import futures
+
+import numpy as np
+
+from demo_advanced import config, registry
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Name of the file defining an ensemble inside its model folder
+DEFINITION_FILE = "ensemble.json"
+
+# Rules available to combine the member outputs
+RULES = ("mean", "vote", "weighted")
+
+# Process-wide pool to run the members of ensembles in parallel
+executor = futures.ThreadPoolExecutor(
+    max_workers=config.ENSEMBLE_WORKERS,
+    thread_name_prefix="ensemble",
+)
+
+
+def load_definition(model_uri):
+    """Returns the ensemble definition at model_uri, None if not ensemble.
+
+    Arguments:
+        model_uri -- Path to the model or ensemble folder.
+    """
+    definition_file = pathlib.Path(model_uri, DEFINITION_FILE)
+    if not definition_file.is_file():
+        return None
+    return json.loads(definition_file.read_text())
+
+
+def validate(members, rule="mean", weights=None):
+    """Validates and returns an ensemble definition.
+
+    Arguments:
+        members -- List of member model names.
+        rule -- Rule to combine the member outputs, see RULES.
+        weights -- Weight for each member when rule is weighted.
+
+    Raises:
+        ValueError: Ensemble definition is not valid.
+
+    Returns:
+        Dictionary with the ensemble members, rule and weights.
+    """
+    if not members:
+        raise ValueError("Ensemble requires at least one member.")
+    if rule not in RULES:
+        raise ValueError(f"Ensemble rule `{rule}` not in {RULES}.")
+    if rule == "weighted" and len(weights or ()) != len(members):
+        raise ValueError("Ensemble requires one weight per member.")
+    return {"members": list(members), "rule": rule, "weights": weights}
+
+
+def combine(outputs, rule="mean", weights=None):
+    """Combines the member outputs into a single prediction.
+
+    Arguments:
+        outputs -- List of arrays with class probabilities per member.
+        rule -- Rule to combine the member outputs, see RULES.
+        weights -- Weight for each member when rule is weighted.
+
+    Returns:
+        Array with the combined class probabilities or votes.
+    """
+    outputs = np.stack(outputs)
+    if rule == "weighted":
+        return np.average(outputs, axis=0, weights=weights)
+    if rule == "vote":
+        votes = np.argmax(outputs, axis=-1)
+        classes = np.arange(outputs.shape[-1])
+        return np.mean(votes[..., None] == classes, axis=0)
+    return np.mean(outputs, axis=0)
+
+
+def predict(predict_fn, members, rule="mean", weights=None):
+    """Predicts with all members in parallel and combines the outputs.
+
+    Arguments:
+        predict_fn -- Function predicting the input with a model uri.
+        members -- List of member model names.
+        rule -- Rule to combine the member outputs, see RULES.
+        weights -- Weight for each member when rule is weighted.
+
+    Returns:
+        Dictionary with the combined predictions and the members timing.
+    """
+    uris = [registry.resolve(x) for x in members]
+    tasks = [executor.submit(_timed, predict_fn, uri) for uri in uris]
+    outputs, times = zip(*(task.result() for task in tasks))
+    logger.debug("Combining %s members using %s", len(members), rule)
+    return {
+        "predictions": combine(outputs, rule, weights),
+        "members": {k: {"time": v} for k, v in zip(members, times)},
+    }
+
+
+def _timed(predict_fn, model_uri):
+    start = time.perf_counter()
+    result = predict_fn(model_uri)
+    return result, time.perf_counter() - start
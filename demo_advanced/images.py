@@ -0,0 +1,158 @@
+"""Module to read archives of image files as input data for predictions.
+
+Producers usually have PNG or JPEG files instead of arrays in NPY format,
+so zip and tar archives of images are accepted as input files. Images are
+decoded in a pool of `DECODE_WORKERS` threads, converted to grayscale,
+resized to `IMAGES_SHAPE`, normalized to [0, 1] as the training images and
+written directly into one preallocated float32 batch.
+
+Archive members are read sequentially and only a bounded number of them
+wait for decoding at any time, so memory does not grow with the archive
+size beyond the batch itself. Members bigger than `IMAGE_MAX_BYTES` are
+rejected before they are read, and images wider or taller than
+`IMAGE_MAX_SIDE` pixels are rejected from their headers before they are
+decoded, as a small compressed file can expand to a huge image.
+"""
+import contextlib
+import functools
+import logging
+import pathlib
+import struct
+import tarfile
+import zipfile
+from concurrent import futures
+
+import numpy as np
+import tensorflow as tf
+
+from demo_advanced import config
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Image formats decoded from archives, see tf.io.decode_image
+SUFFIXES = (".bmp", ".gif", ".jpeg", ".jpg", ".png")
+
+# Process-wide pool to decode the images of all requests
+executor = futures.ThreadPoolExecutor(
+    max_workers=config.DECODE_WORKERS,
+    thread_name_prefix="decode",
+)
+
+
+def is_archive(input_file):
+    """Returns True if input_file is a zip or tar archive of images.
+
+    Zip files without images, such as NPZ files, are not image archives.
+
+    Arguments:
+        input_file -- Path to the input file.
+    """
+    if zipfile.is_zipfile(input_file):
+        with zipfile.ZipFile(input_file) as archive:
+            return any(_is_image(x) for x in archive.namelist())
+    return tarfile.is_tarfile(input_file)
+
+
+def read_archive(input_file):
+    """Decodes the images of an archive into one batch of input data.
+
+    Arguments:
+        input_file -- Path to zip or tar archive with image files.
+
+    Raises:
+        ValueError: Archive without images or image not valid.
+
+    Returns:
+        Tuple with the array of image file names, in archive order, and
+        the float32 batch of images with shape config.IMAGES_SHAPE.
+    """
+    with _members(input_file) as members:
+        if not members:
+            raise ValueError("Input archive has no image files.")
+        logger.debug("Decoding %s images from %s", len(members), input_file)
+        batch = np.empty((len(members), *config.IMAGES_SHAPE), np.float32)
+        pending = set()
+        try:
+            for index, (name, size, read) in enumerate(members):
+                if size > config.IMAGE_MAX_BYTES:
+                    raise ValueError(f"Image `{name}` is too large.")
+                if len(pending) >= 2 * config.DECODE_WORKERS:  # Bounded
+                    done, pending = futures.wait(
+                        pending, return_when=futures.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        task.result()  # Raise decoding errors
+                task = executor.submit(_decode, read(), name, batch[index])
+                pending.add(task)
+            for task in futures.as_completed(pending):
+                task.result()
+        finally:  # Stop decoding the remaining images on errors
+            for task in pending:
+                task.cancel()
+    names = np.array([name for name, _, _ in members])
+    return names, batch
+
+
+def _is_image(name):
+    path = pathlib.PurePosixPath(name)
+    if path.name.startswith(".") or "__MACOSX" in path.parts:
+        return False  # Hidden or metadata files from archivers
+    return path.suffix.lower() in SUFFIXES
+
+
+@contextlib.contextmanager
+def _members(input_file):
+    if zipfile.is_zipfile(input_file):
+        with zipfile.ZipFile(input_file) as archive:
+            yield [
+                (x.filename, x.file_size, functools.partial(archive.read, x))
+                for x in archive.infolist()
+                if not x.is_dir() and _is_image(x.filename)
+            ]
+    else:
+        with tarfile.open(input_file) as archive:
+            yield [
+                (x.name, x.size, functools.partial(_read_tar, archive, x))
+                for x in archive.getmembers()
+                if x.isfile() and _is_image(x.name)
+            ]
+
+
+def _read_tar(archive, member):
+    with archive.extractfile(member) as file:
+        return file.read()
+
+
+def _decode(data, name, output):
+    try:
+        height, width = _image_shape(data)
+        if max(height, width) > config.IMAGE_MAX_SIDE:
+            raise ValueError(f"Image `{name}` is too large.")
+        image = _decode_graph(tf.constant(data))
+    except (struct.error, tf.errors.InvalidArgumentError) as err:
+        raise ValueError(f"Image `{name}` could not be decoded.") from err
+    np.multiply(image.numpy(), 1 / 255, out=output)
+
+
+def _image_shape(data):
+    # Height and width from the file header, without decoding the pixels
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        width, height = struct.unpack(">II", data[16:24])
+    elif data.startswith((b"GIF87a", b"GIF89a")):
+        width, height = struct.unpack("<HH", data[6:10])
+    elif data.startswith(b"BM"):  # Negative height for top-down rows
+        width, height = struct.unpack("<ii", data[18:26])
+    else:  # JPEG, markers are scanned up to the frame header
+        height, width, _ = tf.image.extract_jpeg_shape(data).numpy()
+    return abs(int(height)), abs(int(width))
+
+
+@tf.function(input_signature=[tf.TensorSpec([], tf.string)])
+def _decode_graph(data):
+    # One graph call per image instead of one eager call per operation,
+    # three channels decode all formats, including GIF
+    image = tf.io.decode_image(data, channels=3, expand_animations=False)
+    image = tf.image.rgb_to_grayscale(image)
+    image = tf.image.resize(image, config.IMAGES_SHAPE, antialias=True)
+    return image[..., 0]
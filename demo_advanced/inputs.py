@@ -0,0 +1,153 @@
+"""Module to load and validate input data files for predictions.
+
+Input files are validated from the NPY header before reading any data, so
+wrong shapes or types are rejected without model work. Data is memory-mapped
+instead of fully read, and converted to float32 only once: `uint8` images
+are normalized to [0, 1] as in the training data, `float32` data is used
+directly from the memory map and other float types are cast without ever
+materializing a full buffer in their original type.
+
+Arrays inside uncompressed NPZ files, such as the processed datasets, are
+memory-mapped directly from their offset in the archive.
+"""
+import logging
+import struct
+import zipfile
+
+import numpy as np
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Data types accepted as input for predictions
+DTYPES = (np.uint8, np.float16, np.float32, np.float64)
+
+
+def read_header(input_file):
+    """Reads the header from a NPY file without reading the data.
+
+    Arguments:
+        input_file -- Path or open binary file with NPY format.
+
+    Raises:
+        ValueError: File is not a valid NPY file.
+
+    Returns:
+        Tuple with the shape and dtype of the stored array.
+    """
+    if hasattr(input_file, "read"):
+        return _read_header(input_file)
+    with open(input_file, "rb") as file:
+        return _read_header(file)
+
+
+def validate(shape, dtype, sample_shape=None):
+    """Validates the shape and dtype of an input array.
+
+    Arguments:
+        shape -- Shape of the input array, first axis are samples.
+        dtype -- Data type of the input array.
+        sample_shape -- Expected shape of each sample, default not checked.
+
+    Raises:
+        ValueError: Input shape or dtype not supported.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Input dtype `{dtype}` not supported.")
+    if len(shape) < 2 or shape[0] == 0:
+        raise ValueError(f"Input shape `{shape}` has no samples.")
+    if sample_shape is None or None in sample_shape:
+        return
+    if _squeeze(shape[1:]) != _squeeze(sample_shape):
+        raise ValueError(f"Input shape `{shape}` expected `{sample_shape}`.")
+
+
+def open_array(input_file, key="x_train", sample_shape=None):
+    """Validates the NPY header and memory-maps the input data.
+
+    Arguments:
+        input_file -- Path to NPY or NPZ file with input data.
+        key -- Array name to read when input_file is a NPZ file.
+        sample_shape -- Expected shape of each sample, default not checked.
+
+    Raises:
+        ValueError: Input shape or dtype not supported.
+
+    Returns:
+        Read-only memory-mapped array with the file data.
+    """
+    if zipfile.is_zipfile(input_file):
+        return _open_npz_array(input_file, key, sample_shape)
+    shape, dtype = read_header(input_file)
+    logger.debug("Input header shape %s and dtype %s", shape, dtype)
+    validate(shape, dtype, sample_shape)
+    return np.load(input_file, mmap_mode="r")
+
+
+def as_float32(input_data):
+    """Converts input data into float32 values for model inputs.
+
+    Arguments:
+        input_data -- Array with input data, can be memory-mapped.
+
+    Returns:
+        Array of float32, without copy if input_data is already float32.
+    """
+    if input_data.dtype == np.uint8:  # Normalize as training images
+        return np.multiply(input_data, 1 / 255, dtype=np.float32)
+    return np.asarray(input_data, dtype=np.float32)
+
+
+def sample_shape(model):
+    """Returns the expected sample shape for a model, None if unknown.
+
+    Arguments:
+        model -- Loaded keras model.
+    """
+    input_shape = getattr(model, "input_shape", None)
+    return input_shape[1:] if isinstance(input_shape, tuple) else None
+
+
+def _open_npz_array(input_file, key, sample_shape):
+    with zipfile.ZipFile(input_file) as archive:
+        try:
+            info = archive.getinfo(f"{key}.npy")
+        except KeyError as err:
+            raise ValueError(f"Array `{key}` not found in input.") from err
+        if info.compress_type != zipfile.ZIP_STORED:
+            logger.debug("Compressed array %s, reading into memory", key)
+            with archive.open(info) as file:
+                shape, dtype = _read_header(file)
+                validate(shape, dtype, sample_shape)
+            with np.load(input_file) as arrays:
+                return arrays[key]
+    with open(input_file, "rb") as file:  # Stored arrays can be mapped
+        file.seek(info.header_offset)
+        local_header = file.read(30)  # Fixed size of zip local header
+        name_len, extra_len = struct.unpack("<HH", local_header[26:30])
+        file.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(file)
+        shape, fortran_order, dtype = _read_array_header(file, version)
+        validate(shape, dtype, sample_shape)
+        offset = file.tell()
+    order = "F" if fortran_order else "C"
+    return np.memmap(input_file, dtype, "r", offset, shape, order)
+
+
+def _read_header(file):
+    try:
+        version = np.lib.format.read_magic(file)
+        shape, _, dtype = _read_array_header(file, version)
+    except ValueError as err:
+        raise ValueError("Input file is not a valid NPY file.") from err
+    return shape, dtype
+
+
+def _read_array_header(file, version):
+    if version == (1, 0):
+        return np.lib.format.read_array_header_1_0(file)
+    return np.lib.format.read_array_header_2_0(file)
+
+
+def _squeeze(shape):
+    return tuple(dim for dim in shape if dim != 1)
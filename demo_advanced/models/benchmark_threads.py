@@ -0,0 +1,197 @@
+"""Script to benchmark MNIST model throughput with different thread settings.
+
+Each combination of workers, intra-op and inter-op threads runs the given
+number of worker processes at the same time, each predicting random batches
+for a fixed duration, and reports the total samples per second. Thread
+counts of 0 use the values derived from the host topology when pinning and
+the TensorFlow defaults otherwise.
+"""
+# pylint: disable=unused-import
+import argparse
+import itertools
+import json
+import logging
+import os
+import subprocess  # nosec B404
+import sys
+import time
+
+import numpy as np
+
+import demo_advanced as aimodel  # Applies thread settings on import
+from demo_advanced import config, threads
+
+logger = logging.getLogger(__name__)
+
+
+# Type validators ---------------------------------------------------
+def int_list(string_value):
+    """Validator converter for comma separated integers higher or equal 0."""
+    values = [int(x) for x in string_value.split(",")]
+    if any(value < 0 for value in values):
+        raise ValueError("Values must be greater or equal than 0")
+    return values
+
+
+def positive_list(string_value):
+    """Validator converter for comma separated integers higher than 0."""
+    values = int_list(string_value)
+    if 0 in values:
+        raise ValueError("Values must be greater than 0")
+    return values
+
+
+def duration(string_value):
+    """Validator converter for float values for values higher than 0."""
+    value = float(string_value)
+    if value <= 0:
+        raise ValueError("Duration must be greater than 0")
+    return value
+
+
+def batch_size(string_value):
+    """Validator converter for integer values for values higher than 0."""
+    value = int(string_value)
+    if value <= 0:
+        raise ValueError("Batch size must be greater than 0")
+    return value
+
+
+# Script arguments definition ---------------------------------------
+parser = argparse.ArgumentParser(
+    prog="PROG",
+    description=__doc__,
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="See '<command> --help' to read about a specific sub-command.",
+)
+parser.add_argument(
+    *["-v", "--verbosity"],
+    help="Sets the logging level (default: %(default)s)",
+    type=str,
+    choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+    default="INFO",
+)
+parser.add_argument(
+    *["model_name"],
+    help="Model name to use for identification from models folder.",
+    type=str,
+)
+parser.add_argument(
+    *["--workers"],
+    help="Comma separated worker processes to test (default: 1).",
+    type=positive_list,
+    default=[1],
+)
+parser.add_argument(
+    *["--intra_op"],
+    help="Comma separated intra-op threads to test (default: 0).",
+    type=int_list,
+    default=[0],
+)
+parser.add_argument(
+    *["--inter_op"],
+    help="Comma separated inter-op threads to test (default: 0).",
+    type=int_list,
+    default=[0],
+)
+parser.add_argument(
+    *["--pin"],
+    help="Pin workers to cores using the host topology.",
+    action="store_true",
+)
+parser.add_argument(
+    *["--batch_size"],
+    help="Number of samples per predict call (default: %(default)s).",
+    type=batch_size,
+    default=32,
+)
+parser.add_argument(
+    *["--duration"],
+    help="Seconds to run each worker (default: %(default)s).",
+    type=duration,
+    default=5.0,
+)
+parser.add_argument(
+    *["--worker"],
+    help=argparse.SUPPRESS,  # Internal, run as a benchmark worker
+    action="store_true",
+)
+
+
+# Script command actions --------------------------------------------
+def _run_worker(model_name, batch_size, duration):
+    model = aimodel.cache.load_model(aimodel.registry.resolve(model_name))
+    sample_shape = aimodel.inputs.sample_shape(model) or config.IMAGES_SHAPE
+    input_data = np.random.rand(batch_size, *sample_shape).astype("float32")
+    for _ in range(3):  # Warm up before measuring
+        aimodel.compiled.predict(model, input_data, batch_size=batch_size)
+    samples, start = 0, time.perf_counter()
+    while time.perf_counter() - start < duration:
+        aimodel.compiled.predict(model, input_data, batch_size=batch_size)
+        samples += batch_size
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"samples": samples, "seconds": elapsed}))
+
+
+def _run_setting(model_name, workers, intra_op, inter_op, **options):
+    command = [sys.executable, "-m", __spec__.name, model_name, "--worker"]
+    command += ["--batch_size", str(options["batch_size"])]
+    command += ["--duration", str(options["duration"])]
+    processes = []
+    for index in range(workers):
+        env = dict(
+            os.environ,
+            DEMO_ADVANCED_INTRA_OP_THREADS=str(intra_op),
+            DEMO_ADVANCED_INTER_OP_THREADS=str(inter_op),
+            DEMO_ADVANCED_CPU_AFFINITY="auto" if options["pin"] else "",
+            DEMO_ADVANCED_HOST_WORKERS=str(workers),
+            DEMO_ADVANCED_WORKER_INDEX=str(index),
+        )
+        process = subprocess.Popen(  # nosec B603
+            command, env=env, stdout=subprocess.PIPE, text=True
+        )
+        processes.append(process)
+    throughput = 0.0
+    for process in processes:
+        outs, _ = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"Benchmark worker failed: {command}")
+        result = json.loads(outs.strip().splitlines()[-1])
+        throughput += result["samples"] / result["seconds"]
+    return throughput
+
+
+def _run_command(model_name, **options):
+    # Common operations
+    logging.basicConfig(level=options.pop("verbosity"))
+    if options.pop("worker"):
+        _run_worker(model_name, options["batch_size"], options["duration"])
+        return
+
+    # Show the topology based split for the tested workers
+    for workers in options["workers"]:
+        logger.info("Topology split for %s workers:", workers)
+        for index, worker in enumerate(threads.plan(workers)):
+            logger.info("  worker %s: %s", index, worker)
+
+    # Sweep all the settings combinations
+    logger.info("Benchmarking %s thread settings", model_name)
+    print("workers,intra_op,inter_op,samples_per_sec")
+    sweep = itertools.product(
+        options.pop("workers"),
+        options.pop("intra_op"),
+        options.pop("inter_op"),
+    )
+    for setting in sweep:
+        throughput = _run_setting(model_name, *setting, **options)
+        print(",".join(map(str, setting)) + f",{throughput:.1f}")
+
+    # End of program
+    logger.info("End of MNIST thread settings benchmark script")
+
+
+# Main call ---------------------------------------------------------
+if __name__ == "__main__":
+    args = parser.parse_args()
+    _run_command(**vars(args))
+    sys.exit(0)  # Shell return 0 == success
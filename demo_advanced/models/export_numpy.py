@@ -0,0 +1,89 @@
+"""Script to export a MNIST model to the numpy inference backend, so small
+batches are predicted without the TensorFlow runtime overhead.
+
+Versioned models are exported as a new version entry pointed by the given
+stage alias. Models in the flat layout are exported into the model folder,
+where the export takes precedence over the keras model until it is removed,
+or next to the model file as a new model (e.g. `<name>.npz`).
+"""
+# pylint: disable=unused-import
+import argparse
+import logging
+import pathlib
+import sys
+
+import keras
+
+from demo_advanced import config, numpy_backend, registry  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+
+# Script arguments definition ---------------------------------------
+parser = argparse.ArgumentParser(
+    prog="PROG",
+    description=__doc__,
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="See '<command> --help' to read about a specific sub-command.",
+)
+parser.add_argument(
+    *["-v", "--verbosity"],
+    help="Sets the logging level (default: %(default)s)",
+    type=str,
+    choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+    default="INFO",
+)
+parser.add_argument(
+    *["model_name"],
+    help="Model name to use for identification from models folder.",
+    type=str,
+)
+parser.add_argument(
+    *["--version"],
+    help="Model version number or stage to export (default: MODEL_STAGE).",
+    type=str,
+    default=None,
+)
+parser.add_argument(
+    *["--stage"],
+    help="Stage alias to point at the export (default: %(default)s).",
+    type=str,
+    choices=registry.STAGES,
+    default="Staging",
+)
+
+
+# Script command actions --------------------------------------------
+def _run_command(model_name, version, **options):
+    # Common operations
+    logging.basicConfig(level=options.pop("verbosity"))
+    model_uri = registry.resolve(model_name, version)
+    if numpy_backend.is_export(model_uri):
+        raise ValueError(f"Model `{model_name}` is already a numpy export.")
+
+    # Convert the keras layers, fails on layers numpy does not support
+    logger.debug("Loading model from uri: %s", model_uri)
+    model = numpy_backend.export(keras.models.load_model(model_uri))
+
+    # Save as new version or next to the keras model in the flat layout
+    if registry.versions(model_name):
+        logger.info("Publish export with stage: %s", options["stage"])
+        suffix = numpy_backend.SUFFIX
+        registry.publish(model_name, model, options["stage"], suffix)
+    elif pathlib.Path(model_uri).is_dir():
+        logger.info("Save export into model folder: %s", model_uri)
+        model.save(pathlib.Path(model_uri, numpy_backend.WEIGHTS_FILE))
+    else:
+        export_uri = pathlib.Path(model_uri).with_suffix(numpy_backend.SUFFIX)
+        logger.info("Save export as new model: %s", export_uri.name)
+        model.save(export_uri)
+
+    # End of program
+    logger.info("End of MNIST model numpy export script")
+
+
+# Main call ---------------------------------------------------------
+if __name__ == "__main__":
+    args = parser.parse_args()
+    _run_command(**vars(args))
+    sys.exit(0)  # Shell return 0 == success
@@ -0,0 +1,119 @@
+"""Script to generate a MNIST pipeline model fusing the encoder of an
+autoencoder with a classifier trained on encoded data, so raw images are
+classified in a single forward pass.
+"""
+# pylint: disable=unused-import
+import argparse
+import logging
+import sys
+
+import keras
+import tensorflow as tf
+
+from demo_advanced import config
+
+logger = logging.getLogger(__name__)
+
+
+# Script arguments definition ---------------------------------------
+parser = argparse.ArgumentParser(
+    prog="PROG",
+    description=__doc__,
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="See '<command> --help' to read about a specific sub-command.",
+)
+parser.add_argument(
+    *["-v", "--verbosity"],
+    help="Sets the logging level (default: %(default)s)",
+    type=str,
+    choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+    default="INFO",
+)
+parser.add_argument(
+    *["encoder"],
+    help="Autoencoder name to identify the encoder on models folder.",
+    type=str,
+)
+parser.add_argument(
+    *["classifier"],
+    help="Model name trained on encoded data on models folder.",
+    type=str,
+)
+parser.add_argument(
+    *["-n", "--name"],
+    help="Model name to use for identification on models folder.",
+    type=str,
+    required=True,
+)
+
+
+# Script functions --------------------------------------------------
+def encoder_layers(autoencoder, latent_shape):
+    """Returns the autoencoder layers producing the latent vectors.
+
+    Arguments:
+        autoencoder -- Loaded sequential autoencoder model.
+        latent_shape -- Shape of the latent vectors without batch axis.
+
+    Raises:
+        ValueError: No autoencoder layer outputs latent_shape.
+
+    Returns:
+        List of layers from the input up to the latent layer.
+    """
+    for i, layer in enumerate(autoencoder.layers, start=1):
+        if tuple(layer.output.shape[1:]) == tuple(latent_shape):
+            return autoencoder.layers[:i]
+    raise ValueError(f"Autoencoder has no layer with output {latent_shape}.")
+
+
+# Script command actions --------------------------------------------
+def _run_command(name, encoder, classifier, **options):
+    # Common operations
+    logging.basicConfig(level=options["verbosity"])
+    logger.debug("Generating MNIST pipeline Model as %s", name)
+
+    # Load autoencoder and classifier from models folder
+    logger.info("Loading models %s and %s", encoder, classifier)
+    autoencoder = keras.models.load_model(f"{config.MODELS_URI}/{encoder}")
+    classifier = keras.models.load_model(f"{config.MODELS_URI}/{classifier}")
+
+    # Chain encoder and classifier into a single graph
+    logger.info("Fusing autoencoder encoder layers with the classifier")
+    latent_shape = classifier.input_shape[1:]
+    model = tf.keras.Sequential(
+        [
+            tf.keras.Input(shape=autoencoder.input_shape[1:]),
+            tf.keras.Sequential(
+                encoder_layers(autoencoder, latent_shape), name="encoder"
+            ),
+            classifier,
+        ]
+    )
+    logger.debug("Model generated: %s", model.summary())
+
+    # Reuse the classifier optimizer, loss and metrics
+    logger.info("Compile with classifier loss and metrics")
+    model.compile(
+        optimizer=classifier.optimizer.__class__.from_config(
+            classifier.optimizer.get_config()
+        ),
+        loss=classifier.loss,
+        metrics=[tf.keras.metrics.CategoricalAccuracy()],
+    )
+
+    # Saving model to models folder
+    logger.info("Saving model in %s.", config.MODELS_URI)
+    save_path = f"{config.MODELS_URI}/{name}"
+    model.save(save_path)
+    logger.debug("Model saved with details: %s", save_path)
+
+    # End of program
+    logger.info("End of MNIST pipeline creation script")
+
+
+# Main call ---------------------------------------------------------
+if __name__ == "__main__":
+    args = parser.parse_args()
+    _run_command(**vars(args))
+    sys.exit(0)  # Shell return 0 == success
@@ -62,7 +62,7 @@ parser.add_argument(
 )
 parser.add_argument(
     *["input_file"],
-    help="NPY file to generate model predictions.",
+    help="NPY file, or zip/tar archive of images, to predict.",
     type=pathlib.Path,
 )
 parser.add_argument(
@@ -85,8 +85,10 @@ def _run_command(model_name, input_file, output_file, **options):
 
     # Call training function from aimodel
     logger.info("Generate predictions with options: %s", options)
-    model_uri = pathlib.Path(config.MODELS_URI) / model_name
-    result = aimodel.predict(model_uri, input_file, **options)
+    result = aimodel.predict(model_name, input_file, **options)
+    if isinstance(result, dict):  # Ensembles or image archives
+        logger.info("Prediction details: %s", result.keys() - {"predictions"})
+        result = result["predictions"]
 
     # Write predictions into output file
     logger.info("Writing predictions to output file %s", output_file)
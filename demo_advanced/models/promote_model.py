@@ -0,0 +1,74 @@
+"""Script to promote a MNIST model version to a stage alias, so servers
+switch to it without downtime.
+"""
+# pylint: disable=unused-import
+import argparse
+import logging
+import sys
+
+from demo_advanced import config, registry  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+
+# Type validators ---------------------------------------------------
+def version(string_value):
+    """Validator converter for integer values for values higher than 0."""
+    value = int(string_value)
+    if value <= 0:
+        raise ValueError("Version number must be greater than 0")
+    return value
+
+
+# Script arguments definition ---------------------------------------
+parser = argparse.ArgumentParser(
+    prog="PROG",
+    description=__doc__,
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="See '<command> --help' to read about a specific sub-command.",
+)
+parser.add_argument(
+    *["-v", "--verbosity"],
+    help="Sets the logging level (default: %(default)s)",
+    type=str,
+    choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+    default="INFO",
+)
+parser.add_argument(
+    *["model_name"],
+    help="Model name to use for identification from models folder.",
+    type=str,
+)
+parser.add_argument(
+    *["version"],
+    help="Model version number to promote.",
+    type=version,
+)
+parser.add_argument(
+    *["--stage"],
+    help="Stage alias to point at version (default: %(default)s).",
+    type=str,
+    choices=registry.STAGES,
+    default="Production",
+)
+
+
+# Script command actions --------------------------------------------
+def _run_command(model_name, version, **options):
+    # Common operations
+    logging.basicConfig(level=options.pop("verbosity"))
+    logger.debug("Promoting %s model version %s", model_name, version)
+
+    # Swap the stage alias, servers reload the version in background
+    logger.info("Promote to stage: %s", options["stage"])
+    registry.promote(model_name, version, options["stage"], preload=False)
+
+    # End of program
+    logger.info("End of MNIST model promotion script")
+
+
+# Main call ---------------------------------------------------------
+if __name__ == "__main__":
+    args = parser.parse_args()
+    _run_command(**vars(args))
+    sys.exit(0)  # Shell return 0 == success
@@ -98,8 +98,7 @@ def _run_command(model_name, input_file, **options):
 
     # Call training function from aimodel
     logger.info("Train model using options: %s", options)
-    model_uri = pathlib.Path(config.MODELS_URI) / model_name
-    result = aimodel.train(model_uri, input_file, **options)
+    result = aimodel.train(model_name, input_file, **options)
 
     # End of program
     logger.info("End of MNIST model training script")
@@ -0,0 +1,266 @@
+"""Module to run the forward pass of small models with numpy only.
+
+The model families built by the scripts in demo_advanced/models only use
+Dense, Conv2D, MaxPooling2D, Flatten and Reshape layers, which run in numpy
+with BLAS matrix multiplications: convolutions are unrolled with stride
+tricks into one matrix of input patches (im2col). This avoids the per-call
+overhead of TensorFlow, which dominates the latency of small batches.
+
+Models are exported from keras with `export` and saved as NPZ files with the
+weights and a JSON description of the layers. A model is served with numpy
+when its version entry uses the `.npz` suffix (e.g. `<name>/3.npz`) or when
+its flat layout folder contains a `numpy.npz` file, see demo_advanced.cache.
+This module does not import TensorFlow.
+"""
+import json
+import logging
+import pathlib
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Suffix of exported model version entries
+SUFFIX = ".npz"
+
+# Exported model file inside flat layout model folders
+WEIGHTS_FILE = "numpy.npz"
+
+# Activations supported on exported layers
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0, out=x),
+    "sigmoid": lambda x: 0.5 * (1 + np.tanh(0.5 * x)),  # Never overflows
+    "softmax": lambda x: _softmax(x),
+    "tanh": np.tanh,
+}
+
+
+def is_export(model_uri):
+    """Returns True if model_uri is a model exported for numpy.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+    """
+    model_uri = pathlib.Path(model_uri)
+    if model_uri.is_dir():
+        return (model_uri / WEIGHTS_FILE).is_file()
+    return model_uri.suffix == SUFFIX
+
+
+def export(model):
+    """Converts a keras sequential model into a numpy model.
+
+    Arguments:
+        model -- Keras sequential model, nested sequential models allowed.
+
+    Raises:
+        ValueError: Model uses layers not supported by numpy.
+
+    Returns:
+        NumpyModel with the layers and weights of the model.
+    """
+    layers = [_export_layer(x) for x in _flat_layers(model)]
+    layers = [x for x in layers if x is not None]
+    return NumpyModel(layers, tuple(model.input_shape))
+
+
+def load_model(model_uri):
+    """Loads a numpy model exported with NumpyModel.save.
+
+    Arguments:
+        model_uri -- Path to the NPZ file or to the folder containing it.
+
+    Returns:
+        Loaded NumpyModel.
+    """
+    model_uri = pathlib.Path(model_uri)
+    if model_uri.is_dir():
+        model_uri = model_uri / WEIGHTS_FILE
+    with np.load(model_uri, allow_pickle=False) as arrays:
+        model_config = json.loads(str(arrays["model"]))
+        weights = [arrays[f"{i:04d}"] for i in range(len(arrays) - 1)]
+    return NumpyModel.from_config(model_config, weights)
+
+
+class NumpyModel:
+    """Forward pass of exported layers with a subset of the keras API.
+
+    Arguments:
+        layers -- List of tuples with the layer spec and its weights.
+        input_shape -- Model input shape, first axis are samples.
+    """
+
+    def __init__(self, layers, input_shape):
+        self.layers = layers
+        self.input_shape = input_shape
+        for spec, _ in layers:
+            if spec["type"] not in _FORWARD:
+                raise ValueError(f"Layer `{spec['type']}` not supported.")
+            if spec.get("activation", "linear") not in ACTIVATIONS:
+                raise ValueError(f"Activation `{spec['activation']}` unknown.")
+
+    @classmethod
+    def from_config(cls, model_config, weights):
+        """Creates a model from its configuration and weights.
+
+        Arguments:
+            model_config -- Dictionary returned by get_config.
+            weights -- List of weight arrays returned by get_weights, such
+              as read-only memory maps (see demo_advanced.shared).
+
+        Returns:
+            NumpyModel computing directly on the weight arrays.
+        """
+        weights, layers = iter(weights), []
+        for spec in model_config["layers"]:
+            spec = dict(spec)
+            count = spec.pop("weights")
+            layers.append((spec, [next(weights) for _ in range(count)]))
+        return cls(layers, tuple(model_config["input_shape"]))
+
+    def get_config(self):
+        """Returns a json serializable dictionary with the layer specs."""
+        layers = [{**spec, "weights": len(w)} for spec, w in self.layers]
+        return {"input_shape": self.input_shape, "layers": layers}
+
+    def get_weights(self):
+        """Returns the list of weight arrays of all the layers in order."""
+        return [x for _, weights in self.layers for x in weights]
+
+    def __call__(self, input_data):
+        outputs = np.asarray(input_data, dtype=np.float32)
+        if None not in self.input_shape[1:]:  # E.g. images without channel
+            outputs = outputs.reshape(len(outputs), *self.input_shape[1:])
+        for spec, weights in self.layers:
+            outputs = _FORWARD[spec["type"]](outputs, *weights, **spec)
+            activation = spec.get("activation", "linear")
+            outputs = ACTIVATIONS[activation](outputs)
+        return outputs
+
+    def predict(self, x, batch_size=None, verbose="auto", steps=None):
+        """Performs predictions on batches of input rows.
+
+        Arguments:
+            x -- Array with the input rows.
+            batch_size -- Number of samples per batch, default 32.
+            verbose -- Not used, kept for keras compatibility.
+            steps -- Number of batches to predict, default all.
+
+        Returns:
+            Numpy array with the predictions for each input row.
+        """
+        batch_size = batch_size or 32
+        if steps is not None:
+            x = x[:steps * batch_size]
+        batches = [
+            self(x[start:start + batch_size])
+            for start in range(0, len(x), batch_size)
+        ]
+        return np.concatenate(batches) if batches else np.empty((0,))
+
+    def save(self, filepath):
+        """Saves the model layers and weights into a NPZ file.
+
+        Arguments:
+            filepath -- Path to the output NPZ file.
+        """
+        arrays = {f"{i:04d}": x for i, x in enumerate(self.get_weights())}
+        with open(filepath, "wb") as file:  # Keep the given file name
+            np.savez(file, model=json.dumps(self.get_config()), **arrays)
+
+
+def _flat_layers(model):
+    for layer in model.layers:
+        if hasattr(layer, "layers"):  # Nested sequential, e.g. pipelines
+            yield from _flat_layers(layer)
+        else:
+            yield layer
+
+
+def _export_layer(layer):
+    kind, config = type(layer).__name__, layer.get_config()
+    weights = [np.asarray(x, dtype=np.float32) for x in layer.get_weights()]
+    if kind in ("InputLayer", "Dropout"):  # No effect on predictions
+        return None
+    if config.get("data_format", "channels_last") != "channels_last":
+        raise ValueError(f"Layer `{layer.name}` not channels_last.")
+    if kind in ("Dense", "Activation"):
+        return {"type": kind, "activation": config["activation"]}, weights
+    if kind == "Conv2D":
+        if tuple(config["dilation_rate"]) != (1, 1) or config["groups"] != 1:
+            raise ValueError(f"Layer `{layer.name}` dilation not supported.")
+        spec = {k: config[k] for k in ("strides", "padding", "activation")}
+        return {"type": kind, **spec}, weights
+    if kind == "MaxPooling2D":
+        spec = {k: config[k] for k in ("pool_size", "strides", "padding")}
+        return {"type": kind, **spec}, []
+    if kind == "Flatten":
+        return {"type": kind}, []
+    if kind == "Reshape":
+        return {"type": kind, "target_shape": config["target_shape"]}, []
+    if kind == "Softmax":
+        return {"type": "Activation", "activation": "softmax"}, []
+    raise ValueError(f"Layer `{layer.name}` ({kind}) not supported.")
+
+
+def _dense(inputs, kernel, bias=None, **_):
+    outputs = inputs @ kernel
+    return outputs if bias is None else np.add(outputs, bias, out=outputs)
+
+
+def _conv2d(inputs, kernel, bias=None, strides=(1, 1), padding="valid", **_):
+    if padding == "same":
+        inputs = _pad_same(inputs, kernel.shape[:2], strides, 0)
+    windows = sliding_window_view(inputs, kernel.shape[:2], axis=(1, 2))
+    windows = windows[:, :: strides[0], :: strides[1]]
+    samples, rows, cols = windows.shape[:3]
+    # Unroll patches as (kernel rows, kernel cols, channels) like the kernel
+    patches = windows.transpose(0, 1, 2, 4, 5, 3)
+    patches = patches.reshape(-1, kernel[..., 0].size)
+    outputs = _dense(patches, kernel.reshape(-1, kernel.shape[-1]), bias)
+    return outputs.reshape(samples, rows, cols, kernel.shape[-1])
+
+
+def _max_pooling2d(inputs, pool_size, strides=None, padding="valid", **_):
+    strides = strides or pool_size
+    if padding == "same":
+        inputs = _pad_same(inputs, pool_size, strides, -np.inf)
+    if tuple(pool_size) == tuple(strides):  # Non overlapping, reshape only
+        samples, rows, cols, channels = inputs.shape
+        rows, cols = rows // pool_size[0], cols // pool_size[1]
+        inputs = inputs[:, : rows * pool_size[0], : cols * pool_size[1]]
+        inputs = inputs.reshape(
+            samples, rows, pool_size[0], cols, pool_size[1], channels
+        )
+        return inputs.max(axis=(2, 4))
+    windows = sliding_window_view(inputs, pool_size, axis=(1, 2))
+    return windows[:, :: strides[0], :: strides[1]].max(axis=(-2, -1))
+
+
+def _pad_same(inputs, window, strides, value):
+    # Same output size and padding split as TensorFlow "same" padding
+    pads = [(0, 0)]
+    for size, length, stride in zip(inputs.shape[1:3], window, strides):
+        total = max((-(-size // stride) - 1) * stride + length - size, 0)
+        pads.append((total // 2, total - total // 2))
+    return np.pad(inputs, pads + [(0, 0)], constant_values=value)
+
+
+def _softmax(inputs):
+    outputs = np.exp(inputs - inputs.max(axis=-1, keepdims=True))
+    return np.divide(outputs, outputs.sum(axis=-1, keepdims=True), out=outputs)
+
+
+_FORWARD = {
+    "Activation": lambda inputs, **_: inputs,
+    "Conv2D": _conv2d,
+    "Dense": _dense,
+    "Flatten": lambda inputs, **_: inputs.reshape(len(inputs), -1),
+    "MaxPooling2D": _max_pooling2d,
+    "Reshape": lambda inputs, target_shape, **_: inputs.reshape(
+        len(inputs), *target_shape
+    ),
+}
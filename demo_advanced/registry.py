@@ -0,0 +1,220 @@
+"""Module to store immutable model versions with stage aliases.
+
+Models in `config.MODELS_URI` can be stored as version entries inside the
+model folder, named with the version number and the suffix used to save
+them (e.g. `<name>/3.keras`), plus `Staging` and `Production` stage aliases
+which are symbolic links to a version entry. Versions are never modified
+once written: new versions are saved with a temporary name and linked into
+place, so readers never see half-written models. Promoting a version
+replaces the stage alias atomically.
+
+When a stage alias points to a version not loaded yet by the process (e.g.
+promoted by another process), requests keep using the previously served
+version while the new one loads in a background thread, so traffic never
+blocks on a load after a promotion.
+
+Models without version entries (flat layout) are used from the model
+folder directly and the requested version is ignored.
+"""
+import logging
+import os
+import pathlib
+import secrets
+import threading
+
+from demo_advanced import cache, config
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Stage aliases available for each versioned model
+STAGES = ("Staging", "Production")
+
+# Suffix used to save new model versions
+VERSION_SUFFIX = ".keras"
+
+
+def versions(model_name):
+    """Returns the version entries of a model sorted by version number.
+
+    Arguments:
+        model_name -- Model name in config.MODELS_URI.
+
+    Returns:
+        Dictionary of version numbers to entry paths, empty if flat layout.
+    """
+    model_path = pathlib.Path(config.MODELS_URI, model_name)
+    if not model_path.is_dir():
+        return {}
+    entries = {}
+    for entry in model_path.iterdir():
+        stem = entry.name.partition(".")[0]
+        if stem.isdigit() and not entry.is_symlink():
+            entries[int(stem)] = entry
+    return dict(sorted(entries.items()))
+
+
+def resolve(model_name, version=None):
+    """Returns the path of the model version to load.
+
+    Arguments:
+        model_name -- Model name in config.MODELS_URI.
+        version -- Version number or stage, default config.MODEL_STAGE.
+
+    Raises:
+        ValueError: Version or stage not found for the model.
+
+    Returns:
+        Path to the immutable version entry, or to the model folder if the
+        model uses the flat layout.
+    """
+    entries = versions(model_name)
+    if not entries:  # Flat layout, model saved at the model folder
+        return pathlib.Path(config.MODELS_URI, model_name)
+    version = config.MODEL_STAGE if version is None else version
+    if str(version).isdigit():
+        if int(version) not in entries:
+            raise ValueError(f"Version `{version}` of `{model_name}` missing.")
+        return entries[int(version)]
+    if version not in STAGES:
+        raise ValueError(f"Stage `{version}` not in {STAGES}.")
+    alias = pathlib.Path(config.MODELS_URI, model_name, version)
+    if not alias.is_symlink():
+        raise ValueError(f"Stage `{version}` of `{model_name}` missing.")
+    return serving.target(alias)
+
+
+def publish(model_name, model, stage="Staging", suffix=VERSION_SUFFIX):
+    """Saves a model as a new version and points stage to it.
+
+    The first version of a model is also promoted to Production.
+
+    Arguments:
+        model_name -- Model name in config.MODELS_URI.
+        model -- Keras model, or numpy export, to save.
+        stage -- Stage to point at the new version, None to skip.
+        suffix -- Suffix of the version entry, numpy_backend.SUFFIX for
+          numpy exports.
+
+    Returns:
+        Integer with the new version number.
+    """
+    model_path = pathlib.Path(config.MODELS_URI, model_name)
+    model_path.mkdir(parents=True, exist_ok=True)
+    tmpfile = model_path / f".{secrets.token_hex(8)}{suffix}"
+    model.save(tmpfile)
+    try:  # Links never replace existing files, versions stay immutable
+        while True:
+            version = max(versions(model_name), default=0) + 1
+            try:
+                os.link(tmpfile, model_path / f"{version}{suffix}")
+                break
+            except FileExistsError:  # Published by a concurrent writer
+                continue
+    finally:
+        tmpfile.unlink()
+    logger.info("Published version %s of model %s", version, model_name)
+    if stage is not None:
+        promote(model_name, version, stage, preload=False)
+    if not pathlib.Path(model_path, "Production").is_symlink():
+        promote(model_name, version, "Production", preload=False)
+    return version
+
+
+def promote(model_name, version, stage="Production", preload=True):
+    """Points a stage alias to a model version atomically.
+
+    Arguments:
+        model_name -- Model name in config.MODELS_URI.
+        version -- Version number to promote.
+        stage -- Stage alias to update.
+        preload -- Load the version into the model cache before the swap.
+
+    Raises:
+        ValueError: Version or stage not found for the model.
+    """
+    entry = resolve(model_name, int(version))
+    if stage not in STAGES:
+        raise ValueError(f"Stage `{stage}` not in {STAGES}.")
+    if preload:  # Requests never wait for the promoted version load
+        cache.load_model(entry)
+    alias = pathlib.Path(config.MODELS_URI, model_name, stage)
+    tmplink = alias.with_name(f".{stage}.{secrets.token_hex(8)}")
+    os.symlink(entry.name, tmplink)
+    os.replace(tmplink, alias)  # Atomic swap, readers see old or new
+    serving.update(alias, entry)
+    logger.info("Promoted %s version %s to %s", model_name, version, stage)
+
+
+class Serving:
+    """Thread safe record of the version served for each stage alias."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._targets = {}
+        self._reloading = set()
+
+    def target(self, alias):
+        """Returns the version to serve for a stage alias.
+
+        If the alias points to a version not loaded and the previous one is
+        still cached, the new version loads in background and the previous
+        version is returned meanwhile.
+
+        Arguments:
+            alias -- Path to the stage alias link.
+        """
+        key, target = str(alias), pathlib.Path(os.path.realpath(alias))
+        with self._lock:
+            previous = self._targets.get(key)
+            if target == previous or not self._serves(previous, target):
+                self._targets[key] = target
+                return target
+            if key not in self._reloading:
+                self._reloading.add(key)
+                logger.info("Reloading %s in background: %s", key, target)
+                threading.Thread(
+                    target=self._reload,
+                    args=(key, target),
+                    name=f"reload-{alias.parent.name}-{alias.name}",
+                    daemon=True,
+                ).start()
+            return previous
+
+    def update(self, alias, target):
+        """Records the version served for a stage alias.
+
+        Arguments:
+            alias -- Path to the stage alias link.
+            target -- Path to the version entry now served.
+        """
+        with self._lock:
+            self._targets[str(alias)] = pathlib.Path(os.path.realpath(target))
+
+    def stats(self):
+        """Returns a dictionary with the served version per stage alias."""
+        with self._lock:
+            return {
+                key: {"target": str(x), "reloading": key in self._reloading}
+                for key, x in self._targets.items()
+            }
+
+    def _serves(self, previous, target):
+        if previous is None or previous not in cache.models:
+            return False  # Nothing loaded to serve meanwhile
+        return target not in cache.models
+
+    def _reload(self, key, target):
+        try:
+            cache.load_model(target)
+            with self._lock:
+                self._targets[key] = target
+        except Exception as err:  # pylint: disable=broad-except
+            logger.warning("Failed to reload %s: %s", key, err)
+        finally:
+            with self._lock:
+                self._reloading.discard(key)
+
+
+# Process-wide record of served versions used by resolve
+serving = Serving()
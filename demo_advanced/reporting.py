@@ -0,0 +1,95 @@
+"""Module to collect the serving statistics of the worker processes.
+
+Statistics such as the model cache hits, batch sizes or admission queues
+are kept by the process that predicts, while `deepaas-run` predicts in pool
+processes and answers get_metadata in the main process. When `STATS_URI`
+is configured, each process predicting writes its statistics into that
+folder as a JSON file named by its process id, at most once every
+`STATS_INTERVAL` seconds, and `collect` reads the files of the processes
+still running. Files of finished processes, such as pool processes
+replaced after a cancelled request, are removed when collected.
+"""
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+
+from demo_advanced import config
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Time of the last statistics written by this process, see publish
+_published = None
+_publish_lock = threading.Lock()
+
+
+def enabled():
+    """Returns True if worker statistics are collected."""
+    return bool(config.STATS_URI)
+
+
+def publish(stats_fn, force=False):
+    """Writes the statistics of the process when the interval passed.
+
+    Arguments:
+        stats_fn -- Function returning the json serializable statistics,
+          only called when the statistics are written.
+        force -- Write the statistics even if the interval did not pass.
+
+    Returns:
+        True if the statistics were written.
+    """
+    global _published  # pylint: disable=global-statement
+    if not enabled():
+        return False
+    with _publish_lock:
+        now = time.monotonic()
+        if not force and _published is not None:
+            if now - _published < config.STATS_INTERVAL:
+                return False
+        _published = now
+    folder = pathlib.Path(config.STATS_URI)
+    folder.mkdir(parents=True, exist_ok=True)
+    target = folder / f"{os.getpid()}.json"
+    tmpfile = folder / f"{os.getpid()}.tmp"
+    try:  # Write and rename, readers never see halves
+        tmpfile.write_text(json.dumps(stats_fn(), default=str))
+        os.replace(tmpfile, target)
+    except OSError as err:  # Statistics never fail predictions
+        logger.warning("Statistics not published: %s", err)
+        return False
+    return True
+
+
+def collect():
+    """Returns the last statistics written by each running process.
+
+    Returns:
+        Dictionary of process ids to their statistics.
+    """
+    processes = {}
+    for file in sorted(pathlib.Path(config.STATS_URI).glob("*.json")):
+        if not file.stem.isdigit():
+            continue
+        pid = int(file.stem)
+        if not _running(pid):
+            file.unlink(missing_ok=True)
+            continue
+        try:
+            processes[pid] = json.loads(file.read_text())
+        except (OSError, ValueError):  # Removed or replaced while reading
+            continue
+    return processes
+
+
+def _running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # Running under another user
+        return True
+    return True
@@ -0,0 +1,180 @@
+"""Module to cache prediction results addressed by their inputs content.
+
+Identical inputs are often predicted again (retries, refreshed dashboards,
+shared test batches). Results are cached using a hash of the input data,
+the model path and its modification time, and the predict options, so
+results are not reused after the model is saved again (e.g. by training).
+
+The cache has an in-memory LRU tier bounded by `RESULT_CACHE_BYTES` and an
+optional disk tier at `RESULT_CACHE_URI` bounded by `RESULT_CACHE_DISK_BYTES`
+that survives restarts. Both are disabled by default.
+"""
+import collections
+import hashlib
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+
+import numpy as np
+
+from demo_advanced import cache, config
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Number of rows hashed on each update, limits memory read from maps
+HASH_CHUNK_ROWS = 4096
+
+
+def enabled():
+    """Returns True if any of the result cache tiers is configured."""
+    return config.RESULT_CACHE_BYTES > 0 or bool(config.RESULT_CACHE_URI)
+
+
+def make_key(model_uri, input_data, **options):
+    """Returns the cache key for a prediction, None if cache is disabled.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+        input_data -- Array with the data to predict, can be memory-mapped.
+        options -- Predict options which modify the result.
+
+    Returns:
+        String with the hexadecimal digest identifying the prediction.
+    """
+    if not enabled():
+        return None
+    model_uri = pathlib.Path(model_uri).absolute()
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{model_uri}:{cache.model_version(model_uri)}".encode())
+    digest.update(f"{sorted(options.items())}".encode())
+    digest.update(f"{input_data.dtype.str}:{input_data.shape}".encode())
+    for start in range(0, len(input_data), HASH_CHUNK_ROWS):
+        chunk = input_data[start:][:HASH_CHUNK_ROWS]
+        digest.update(np.ascontiguousarray(chunk).data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Thread safe two tier cache of prediction results.
+
+    Arguments:
+        maxbytes -- Maximum bytes of results to keep in memory.
+        directory -- Folder for the disk tier, None disables it.
+        maxdiskbytes -- Maximum bytes of results to keep in directory.
+    """
+
+    def __init__(self, maxbytes, directory=None, maxdiskbytes=0):
+        self.maxbytes = maxbytes
+        self.directory = pathlib.Path(directory) if directory else None
+        self.maxdiskbytes = maxdiskbytes
+        self._entries = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = self.disk_hits = self.misses = 0
+
+    def get(self, key):
+        """Returns the cached result for key, None if not found.
+
+        Arguments:
+            key -- Key generated with make_key, None skips the cache.
+        """
+        if key is None:
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+        result = self._read(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._store(key, result)
+        return result
+
+    def put(self, key, result):
+        """Stores a prediction result on the configured tiers.
+
+        Arguments:
+            key -- Key generated with make_key, None skips the cache.
+            result -- Array with the prediction result.
+        """
+        if key is None or not isinstance(result, np.ndarray):
+            return
+        result.setflags(write=False)  # Shared between callers
+        self._store(key, result)
+        self._write(key, result)
+
+    def stats(self):
+        """Returns a dictionary with the result cache statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "nbytes": self._nbytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+    def _store(self, key, result):
+        if result.nbytes > self.maxbytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key).nbytes
+            self._entries[key] = result
+            self._nbytes += result.nbytes
+            while self._nbytes > self.maxbytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    def _read(self, key):
+        if self.directory is None:
+            return None
+        try:
+            result = np.load(self.directory / f"{key}.npy")
+        except (OSError, ValueError):
+            return None
+        result.setflags(write=False)
+        return result
+
+    def _write(self, key, result):
+        if self.directory is None or result.nbytes > self.maxdiskbytes:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.directory / f"{key}.npy"
+        if target.exists():
+            return
+        fd, tmpfile = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            np.save(file, result)
+        os.replace(tmpfile, target)  # Readers never see partial files
+        self._prune()
+
+    def _prune(self):
+        files = []
+        for file in self.directory.glob("*.npy"):
+            try:  # Files might be removed by other processes
+                files.append((file.stat(), file))
+            except FileNotFoundError:
+                continue
+        files.sort(key=lambda x: x[0].st_mtime)
+        nbytes = sum(stat.st_size for stat, _ in files)
+        for stat, file in files:
+            if nbytes <= self.maxdiskbytes:
+                break
+            file.unlink(missing_ok=True)
+            nbytes -= stat.st_size
+
+
+# Process-wide cache used by demo_advanced.predict
+store = ResultCache(
+    maxbytes=config.RESULT_CACHE_BYTES,
+    directory=config.RESULT_CACHE_URI,
+    maxdiskbytes=config.RESULT_CACHE_DISK_BYTES,
+)
@@ -0,0 +1,145 @@
+"""Module to evaluate candidate models on live traffic in the background.
+
+Before promoting a retrained model it is useful to compare it with the
+served model on real inputs. When `SHADOW_RATE` is configured, that
+fraction of the predictions is mirrored to a shadow model, by default the
+`Staging` version of the requested model (see demo_advanced.registry).
+Models in the flat layout have no stages, so their predictions are not
+mirrored unless `SHADOW_MODEL` names a different model.
+
+Mirrored inputs go through a bounded queue consumed by a single background
+thread, so the primary response never waits for the shadow model: inputs
+are dropped (shed) when the queue is full. The agreement rate between the
+primary and shadow top classes and the mean latency of both models are
+accumulated and reported in the serving statistics.
+"""
+import logging
+import pathlib
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+from demo_advanced import cache, compiled, config, inputs, registry
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+
+def enabled():
+    """Returns True if predictions are mirrored to a shadow model."""
+    return config.SHADOW_RATE > 0
+
+
+class ShadowEvaluator:
+    """Background evaluation of a shadow model against the primary one.
+
+    Arguments:
+        max_queue -- Maximum number of mirrored inputs waiting evaluation.
+    """
+
+    def __init__(self, max_queue):
+        self._queue = queue.Queue(max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.submitted = self.shed = self.evaluated = self.failed = 0
+        self.rows = self.agreed = 0
+        self.primary_time = self.shadow_time = 0.0
+
+    def submit(self, model_name, input_data, result, elapsed, model_uri=None):
+        """Mirrors a sampled prediction to the shadow model without waiting.
+
+        Arguments:
+            model_name -- Model name used for the primary prediction.
+            input_data -- Array with the predicted input rows.
+            result -- Array with the primary model predictions.
+            elapsed -- Seconds spent on the primary prediction.
+            model_uri -- Path of the primary model, predictions are not
+              mirrored when the shadow model resolves to the same path.
+
+        Returns:
+            True if the input was queued for evaluation.
+        """
+        if not enabled():
+            return False
+        sampled = random.random()  # nosec B311  # Traffic sampling only
+        if sampled >= config.SHADOW_RATE or _same_model(model_name, model_uri):
+            return False
+        try:
+            self._queue.put_nowait((model_name, input_data, result, elapsed))
+        except queue.Full:  # Shed load instead of delaying predictions
+            with self._lock:
+                self.shed += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="shadow", daemon=True
+                )
+                self._thread.start()
+        return True
+
+    def stats(self):
+        """Returns a dictionary with the shadow evaluation statistics."""
+        with self._lock:
+            evaluated = max(self.evaluated, 1)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "submitted": self.submitted,
+                "shed": self.shed,
+                "evaluated": self.evaluated,
+                "failed": self.failed,
+                "agreement": self.agreed / max(self.rows, 1),
+                "primary_time": self.primary_time / evaluated,
+                "shadow_time": self.shadow_time / evaluated,
+            }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._evaluate(*item)
+            except Exception as err:  # pylint: disable=broad-except
+                logger.debug("Shadow evaluation failed: %s", err)
+                with self._lock:
+                    self.failed += 1
+
+    def _evaluate(self, model_name, input_data, result, elapsed):
+        model_uri = _shadow_uri(model_name)
+        model = cache.load_model(model_uri)
+        start = time.perf_counter()
+        input_data = inputs.as_float32(input_data[:len(result)])
+        shadow = compiled.predict(model, input_data)
+        shadow_time = time.perf_counter() - start
+        agreed = np.argmax(shadow, axis=-1) == np.argmax(result, axis=-1)
+        with self._lock:
+            self.evaluated += 1
+            self.rows += len(agreed)
+            self.agreed += int(np.count_nonzero(agreed))
+            self.primary_time += elapsed
+            self.shadow_time += shadow_time
+
+
+def _shadow_uri(model_name):
+    shadow_name = config.SHADOW_MODEL or model_name
+    return registry.resolve(shadow_name, config.SHADOW_VERSION)
+
+
+def _same_model(model_name, model_uri):
+    # Flat layout models resolve any stage to the primary model itself
+    if model_uri is None:
+        return False
+    try:
+        shadow_uri = _shadow_uri(model_name)
+    except ValueError:  # Shadow version missing, reported on evaluation
+        return False
+    return pathlib.Path(shadow_uri).absolute() == (
+        pathlib.Path(model_uri).absolute()
+    )
+
+
+# Process-wide evaluator used by demo_advanced.predict
+evaluator = ShadowEvaluator(config.SHADOW_QUEUE)
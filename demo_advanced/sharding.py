@@ -0,0 +1,104 @@
+"""Module to split large predictions across a pool of worker processes.
+
+A single `model.predict` call uses only one process, leaving the rest of
+the host cores idle for large inputs. When enabled with `SHARD_MIN_ROWS`,
+inputs with at least that number of rows are split along the first axis
+into shards of `SHARD_SIZE` rows, predicted by `SHARD_WORKERS` processes
+and joined back in order.
+
+Worker processes keep their models resident in their own model cache and
+read the shards directly from the input file, so the input data is not
+copied through the pool. When started from `warm`, workers preload the
+registered models. Numpy exports map the weights published by the parent
+process if `SHARED_WEIGHTS_URI` is configured (see `demo_advanced.shared`).
+"""
+import logging
+import math
+import multiprocessing
+import threading
+from concurrent import futures
+
+import numpy as np
+
+from demo_advanced import cache, compiled, config, inputs
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Process pool created on first use, see get_executor
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(preload=()):
+    """Returns the process pool used to predict shards.
+
+    Arguments:
+        preload -- Model uris each worker loads when it starts, only used
+          when the pool is created.
+
+    Returns:
+        ProcessPoolExecutor with config.SHARD_WORKERS processes.
+    """
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            context = multiprocessing.get_context("spawn")
+            _executor = futures.ProcessPoolExecutor(
+                max_workers=config.SHARD_WORKERS,
+                mp_context=context,
+                initializer=_preload,
+                initargs=([str(uri) for uri in preload],),
+            )
+        return _executor
+
+
+def enabled(rows):
+    """Returns True if an input with rows should be split in shards.
+
+    Arguments:
+        rows -- Number of rows in the input data.
+    """
+    return 0 < config.SHARD_MIN_ROWS <= rows and config.SHARD_WORKERS > 1
+
+
+def predict(model_uri, input_file, array_name, rows, **options):
+    """Performs predictions splitting the input file in shards.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+        input_file -- NPY or NPZ file with the data to predict.
+        array_name -- Array to predict when input_file is a NPZ file.
+        rows -- Number of rows in the input file.
+        options -- See tensorflow/keras predict documentation.
+
+    Returns:
+        Array with the joined predictions for all the rows.
+    """
+    shard_size = config.SHARD_SIZE or math.ceil(rows / config.SHARD_WORKERS)
+    starts = range(0, rows, shard_size)
+    bounds = [(i, min(i + shard_size, rows)) for i in starts]
+    logger.debug("Predict %d rows in %d shards", rows, len(bounds))
+    data = str(input_file), array_name
+    tasks = [
+        get_executor().submit(
+            _predict_shard, str(model_uri), *data, *shard, **options
+        )
+        for shard in bounds
+    ]
+    return np.concatenate([task.result() for task in tasks])
+
+
+def _preload(model_uris):
+    for model_uri in model_uris:
+        try:
+            cache.load_model(model_uri)
+        except Exception as err:  # pylint: disable=broad-except
+            logger.warning("Model %s not preloaded: %s", model_uri, err)
+
+
+def _predict_shard(model_uri, input_file, key, start, stop, **options):
+    input_data = inputs.open_array(input_file, key)[start:stop]
+    input_data = inputs.as_float32(input_data)
+    model = cache.load_model(model_uri)
+    return compiled.predict(model, input_data, **options)
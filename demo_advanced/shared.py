@@ -0,0 +1,122 @@
+"""Module to share model weights as memory-mapped files between processes.
+
+Each worker process loading a model from `config.MODELS_URI` deserializes
+and keeps its own copy of the model weights. When `SHARED_WEIGHTS_URI` is
+configured (ideally a tmpfs folder such as `/dev/shm`), the first process
+loading a numpy export (see demo_advanced.numpy_backend) publishes its
+layer specs and weights once, as plain NPY files. Every process, including
+the first one, then attaches the weights as read-only memory maps and the
+numpy backend computes directly on them, so the weights bytes are kept
+only once in the host page cache whatever the number of workers.
+
+Keras models are not published: keras copies any attached weights into its
+own variables, so sharing them would add a copy instead of removing one.
+Export models to the numpy backend to share their weights.
+
+Published models are identified by the model path and its modification
+time, so a model saved again is published again under a new folder.
+"""
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+
+import numpy as np
+
+from demo_advanced import config, numpy_backend
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+
+def enabled():
+    """Returns True if shared weights are configured."""
+    return bool(config.SHARED_WEIGHTS_URI)
+
+
+def store_path(model_uri, version):
+    """Returns the folder where a model version is published.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+        version -- Model modification time, see cache.model_version.
+
+    Returns:
+        Path to the published model folder.
+    """
+    model_id = f"{pathlib.Path(model_uri).absolute()}:{version}"
+    digest = hashlib.sha256(model_id.encode()).hexdigest()[:16]
+    return pathlib.Path(config.SHARED_WEIGHTS_URI, digest)
+
+
+def publish(model_uri, model, version):
+    """Writes the model layer specs and weights into the shared store.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+        model -- Loaded NumpyModel to publish.
+        version -- Model modification time, see cache.model_version.
+
+    Returns:
+        Path to the published model folder.
+    """
+    target = store_path(model_uri, version)
+    if target.exists():
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmpdir = tempfile.mkdtemp(dir=target.parent)
+    try:  # Write in temporary folder and rename, readers never see halves
+        model_config = json.dumps(model.get_config())
+        pathlib.Path(tmpdir, "model.json").write_text(model_config)
+        for i, weights in enumerate(model.get_weights()):
+            np.save(pathlib.Path(tmpdir, f"{i:04d}.npy"), weights)
+        os.rename(tmpdir, target)
+        logger.debug("Published model %s at %s", model_uri, target)
+    except OSError:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        if not target.exists():  # Might be published by other process
+            raise
+    return target
+
+
+def attach(model_uri, version):
+    """Returns read-only memory maps with the published model weights.
+
+    Arguments:
+        model_uri -- Path to the model file or folder.
+        version -- Model modification time, see cache.model_version.
+
+    Returns:
+        List of read-only arrays, None if the model is not published.
+    """
+    target = store_path(model_uri, version)
+    if not target.exists():
+        return None
+    files = sorted(target.glob("*.npy"))
+    return [np.load(file, mmap_mode="r") for file in files]
+
+
+def load_model(model_uri, version):
+    """Returns a numpy export computing on the shared weights.
+
+    The export is published first when no process published it yet.
+
+    Arguments:
+        model_uri -- Path to the numpy export file or folder.
+        version -- Model modification time, see cache.model_version.
+
+    Returns:
+        NumpyModel with read-only memory-mapped weights.
+    """
+    weights = attach(model_uri, version)
+    if weights is None:  # First process loading this version
+        model = numpy_backend.load_model(model_uri)
+        publish(model_uri, model, version)
+        weights = attach(model_uri, version)
+    model_config = store_path(model_uri, version) / "model.json"
+    model_config = json.loads(model_config.read_text())
+    logger.debug("Loaded model %s from shared weights", model_uri)
+    return numpy_backend.NumpyModel.from_config(model_config, weights)
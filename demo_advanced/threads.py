@@ -0,0 +1,189 @@
+"""Module to configure the TensorFlow thread pools of each worker process.
+
+By default TensorFlow sizes its intra-op and inter-op thread pools using all
+the host cores, so several serving processes on the same host oversubscribe
+the cores and throughput drops. The thread counts can be fixed with
+`INTRA_OP_THREADS` and `INTER_OP_THREADS`, and each process pinned to a list
+of cores with `CPU_AFFINITY`.
+
+When `CPU_AFFINITY` is `auto`, the host cores are split between the
+`HOST_WORKERS` processes using the host topology and each process takes the
+cores of its worker index: workers get whole physical cores, kept in the
+same socket when possible, and thread counts not configured are derived
+from them. Settings must be applied before TensorFlow initializes, which is
+done when importing demo_advanced.
+
+All the DEEPaaS pool processes inherit the same environment, so unless
+`WORKER_INDEX` is set, each process derives its index from its
+multiprocessing identity. Pool processes are numbered in creation order,
+so with `HOST_WORKERS` equal to the DEEPaaS workers each pool process gets
+its own cores. A pool process replaced after a cancelled request gets the
+next number and may share the cores of another worker.
+
+The main process is not pinned, as its pinning would be inherited by the
+pool processes it spawns. The cores are split from the cpus available to
+the first process importing the package, which are passed to the child
+processes in the environment, and shard worker processes (see
+demo_advanced.sharding) are reset to all those cpus instead of sharing the
+cores of the pool process starting them.
+"""
+import collections
+import logging
+import multiprocessing
+import os
+import pathlib
+
+import numpy as np
+import tensorflow as tf
+
+from demo_advanced import config
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Path to the linux sysfs cpu topology information
+CPU_TOPOLOGY = "/sys/devices/system/cpu"
+
+# Environment variable passing the cpus available before any pinning to
+# child processes, which otherwise inherit the pinned cpus of their parent
+HOST_CPUS_ENV = "_DEMO_ADVANCED_HOST_CPUS"
+
+# Settings applied to the current process by configure
+settings = {}
+
+
+def host_cpus():
+    """Returns the cpus available to the host workers before any pinning.
+
+    Returns:
+        List of cpus captured by the first process calling this function,
+        usually the main process when importing demo_advanced.
+    """
+    value = os.environ.get(HOST_CPUS_ENV)
+    if value:
+        return parse_cpus(value)
+    cpus = _available_cpus()
+    os.environ[HOST_CPUS_ENV] = ",".join(str(x) for x in cpus)
+    return cpus
+
+
+def topology():
+    """Returns the host cpus grouped by socket and core, see host_cpus.
+
+    Returns:
+        Dictionary of socket ids to dictionaries of physical core ids to the
+        list of logical cpus (hyperthreads) of the core.
+    """
+    sockets = collections.defaultdict(dict)
+    for cpu in host_cpus():
+        path = pathlib.Path(CPU_TOPOLOGY, f"cpu{cpu}", "topology")
+        try:
+            socket = int((path / "physical_package_id").read_text())
+            core = int((path / "core_id").read_text())
+        except (OSError, ValueError):  # No sysfs, one core per cpu
+            socket, core = 0, cpu
+        sockets[socket].setdefault(core, []).append(cpu)
+    return dict(sorted(sockets.items()))
+
+
+def plan(workers):
+    """Splits the host cores between worker processes.
+
+    Arguments:
+        workers -- Number of worker processes on the host.
+
+    Returns:
+        List with the cpus, intra-op and inter-op threads for each worker.
+    """
+    cores = [
+        (socket, cpus)
+        for socket, socket_cores in topology().items()
+        for _, cpus in sorted(socket_cores.items())
+    ]
+    if workers > len(cores):  # Not enough physical cores, split threads
+        cores = [(socket, [cpu]) for socket, cpus in cores for cpu in cpus]
+    groups = np.array_split(np.arange(len(cores)), workers)
+    if workers > len(cores):  # Not enough cpus, workers share them
+        groups = [[i % len(cores)] for i in range(workers)]
+    return [
+        {
+            "cpus": sorted(cpu for i in group for cpu in cores[i][1]),
+            "intra_op": max(len(group), 1),
+            "inter_op": len({cores[i][0] for i in group}) or 1,
+        }
+        for group in groups
+    ]
+
+
+def parse_cpus(value):
+    """Converts a cpu list string such as `0-3,8` into a list of cpus.
+
+    Arguments:
+        value -- String with comma separated cpus or cpu ranges.
+
+    Raises:
+        ValueError: String is not a valid cpu list.
+    """
+    cpus = []
+    for item in value.split(","):
+        first, _, last = item.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return sorted(set(cpus))
+
+
+def worker_index():
+    """Returns the index of the process between the host workers.
+
+    Returns:
+        Integer from config.WORKER_INDEX if configured, otherwise the
+        creation number minus one of pool processes. None for the main
+        process without WORKER_INDEX and for child processes which are not
+        pool processes, such as shards.
+    """
+    process = multiprocessing.current_process()
+    pool_worker = "PoolWorker" in process.name
+    if multiprocessing.parent_process() is not None and not pool_worker:
+        return None  # Shards, spread on all host cpus
+    if config.WORKER_INDEX is not None:
+        return config.WORKER_INDEX
+    identity = process._identity  # pylint: disable=protected-access
+    return identity[0] - 1 if pool_worker and identity else None
+
+
+def configure():
+    """Applies the thread and affinity configuration to the process.
+
+    Returns:
+        Dictionary with the applied cpus, intra-op and inter-op threads.
+    """
+    intra_op, inter_op = config.INTRA_OP_THREADS, config.INTER_OP_THREADS
+    cpus, index = None, worker_index()
+    available = host_cpus()  # Captured before any pinning
+    if config.CPU_AFFINITY == "auto" and index is not None:
+        workers = plan(config.HOST_WORKERS)
+        worker = workers[index % len(workers)]
+        cpus = worker["cpus"]
+        intra_op = intra_op or worker["intra_op"]
+        inter_op = inter_op or worker["inter_op"]
+    elif config.CPU_AFFINITY == "auto":  # Undo pinning inherited by shards
+        cpus = available if multiprocessing.parent_process() else None
+    elif config.CPU_AFFINITY:
+        cpus = parse_cpus(config.CPU_AFFINITY)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as err:  # Runtime already initialized
+        logger.warning("Thread configuration not applied: %s", err)
+    settings.update(cpus=cpus, intra_op=intra_op, inter_op=inter_op)
+    logger.debug("Applied thread settings: %s", settings)
+    return settings
+
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
@@ -6,11 +6,13 @@ related to the environment and generic tests.
 """
 
 # pylint: disable=redefined-outer-name
+import asyncio
 import inspect
 import os
 import pathlib
 import shutil
 import tempfile
+import threading
 from random import random
 from unittest.mock import create_autospec, patch
 
@@ -19,6 +21,7 @@ import pytest
 from keras import models
 
 import api
+import demo_advanced as aimodel
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -60,6 +63,27 @@ def copytree_models(tempdir, path_testmodels):
     shutil.copytree(path_testmodels, f"{tempdir}/{api.config.MODELS_URI}")
 
 
+@pytest.fixture(scope="module")
+def save_model(tempdir):
+    """Fixture to save small sequential models into the temp models folder."""
+    def save(model_name, *layers):  # fmt: skip
+        model = models.Sequential(list(layers))
+        model.compile(optimizer="sgd", loss="mse")  # Trainable when loaded
+        model.save(f"{tempdir}/{api.config.MODELS_URI}/{model_name}")
+        return model
+    return save
+
+
+@pytest.fixture()
+def configure(monkeypatch):
+    """Fixture to patch demo_advanced or api configuration values."""
+    def patch_config(**values):  # fmt: skip
+        for name, value in values.items():
+            config = aimodel.config if hasattr(aimodel.config, name) else None
+            monkeypatch.setattr(config or api.config, name, value)
+    return patch_config
+
+
 def generate_signature(names, kind=inspect.Parameter.POSITIONAL_OR_KEYWORD):
     """Function to generate dynamically signatures."""
     parameters = [inspect.Parameter(name, kind) for name in names]
@@ -96,9 +120,56 @@ def predictions(predict_kwds):
     model.predict.return_value = predictions
     with patch("keras.models.load_model", autospec=True) as load:
         load.return_value = model
+        aimodel.cache.models.invalidate()  # Load the mocked model
         return api.predict(**predict_kwds)
 
 
+@pytest.fixture(scope="module")
+def mocked_predict():
+    """Fixture to return api.predict on mocked models, one row per input."""
+    def side_effect(input_data, *args, **kwargs):  # fmt: skip
+        return np.random.dirichlet(np.ones(10), size=[len(input_data)])
+    model = create_autospec(
+        models.Model, predict=create_autospec(models.Model.predict)
+    )
+    model.predict.side_effect = side_effect
+
+    def predict(**predict_kwds):
+        with patch("keras.models.load_model", autospec=True) as load:
+            load.return_value = model
+            aimodel.cache.models.invalidate()  # Load the mocked model
+            return api.predict(**predict_kwds)
+    return predict
+
+
+@pytest.fixture(scope="module")
+def model_threads():
+    """Fixture to collect the names of the threads running model calls."""
+    return []
+
+
+def record_thread(model_threads, return_value):
+    """Function to generate a mock side effect that records its thread."""
+    def side_effect(*args, **kwargs):  # fmt: skip
+        model_threads.append(threading.current_thread().name)
+        return return_value
+    return side_effect
+
+
+@pytest.fixture(scope="module")
+def async_predictions(predict_kwds, model_threads):
+    """Fixture to return predictions from the coroutine variant."""
+    predictions = np.random.dirichlet(np.ones(10), size=[20])
+    model = create_autospec(
+        models.Model, predict=create_autospec(models.Model.predict)
+    )
+    model.predict.side_effect = record_thread(model_threads, predictions)
+    with patch("keras.models.load_model", autospec=True) as load:
+        load.return_value = model
+        aimodel.cache.models.invalidate()  # Load the mocked model
+        return asyncio.run(api.predict_async(**predict_kwds))
+
+
 # Generate and inject fixtures for training arguments
 fields_training = api.schemas.TrainArgsSchema().fields
 signature = generate_signature(fields_training.keys())
@@ -118,4 +189,22 @@ def training(training_kwds):
     model.fit.return_value = train_results
     with patch("keras.models.load_model", autospec=True) as load:
         load.return_value = model
+        aimodel.cache.models.invalidate()  # Load the mocked model
         return api.train(**training_kwds)
+
+
+@pytest.fixture(scope="module")
+def async_training(training_kwds, model_threads):
+    """Fixture to return training from the coroutine variant."""
+    train_results = {
+        "loss": [random() for _ in range(20)],
+        "categorical_accuracy": [random() for _ in range(20)],
+    }
+    model = create_autospec(
+        models.Model, fit=create_autospec(models.Model.fit)
+    )
+    model.fit.side_effect = record_thread(model_threads, train_results)
+    with patch("keras.models.load_model", autospec=True) as load:
+        load.return_value = model
+        aimodel.cache.models.invalidate()  # Load the mocked model
+        return asyncio.run(api.train_async(**training_kwds))
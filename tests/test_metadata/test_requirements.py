@@ -17,6 +17,11 @@ the same folder. However, remember to add the prefix `test_` to the file.
 """
 # pylint: disable=redefined-outer-name
 # pylint: disable=unused-argument
+import os
+import pathlib
+
+import api
+import demo_advanced as aimodel
 
 
 def test_author(metadata):
@@ -63,3 +68,16 @@ def test_datasets(metadata):
     """Tests that metadata provides datasets information."""
     assert "datasets" in metadata
     assert metadata["datasets"] == ["t100-dataset.npz"]
+
+
+def test_serving(metadata, tempdir, configure):
+    """Tests that metadata provides the statistics of running processes."""
+    assert "serving" not in metadata  # Disabled by default
+    configure(STATS_URI=f"{tempdir}/stats")
+    assert aimodel.reporting.publish(aimodel.stats, force=True)
+    stale = pathlib.Path(tempdir, "stats", "99999999.json")
+    stale.write_text("{}")  # Process finished
+    serving = api.get_metadata()["serving"]
+    assert list(serving) == [os.getpid()]
+    assert "model_cache" in serving[os.getpid()]
+    assert not stale.exists()
@@ -51,6 +51,18 @@ def input_file(request):
     return UploadedFile("", filename=f"{filepath}/{request.param}")
 
 
+@pytest.fixture(scope="module", params=[None])
+def dataset(request):
+    """Fixture to provide the dataset argument to api.predict."""
+    return request.param
+
+
+@pytest.fixture(scope="module", params=[None])
+def array_name(request):
+    """Fixture to provide the array_name option to api.predict."""
+    return request.param
+
+
 @pytest.fixture(scope="module", params=["simple_convolution"])
 def model_name(request):
     """Fixture to provide the model_name argument to api.predict."""
@@ -75,6 +87,54 @@ def steps(request):
     return request.param
 
 
+@pytest.fixture(scope="module", params=[None, 60.0])
+def timeout(request):
+    """Fixture to provide the timeout option to api.predict."""
+    return request.param
+
+
+@pytest.fixture(scope="module", params=[None])
+def cascade_model(request):
+    """Fixture to provide the cascade_model option to api.predict."""
+    return request.param
+
+
+@pytest.fixture(scope="module", params=[None])
+def threshold(request):
+    """Fixture to provide the threshold option to api.predict."""
+    return request.param
+
+
+@pytest.fixture(scope="module", params=[None])
+def rule(request):
+    """Fixture to provide the ensemble rule option to api.predict."""
+    return request.param
+
+
+@pytest.fixture(scope="module", params=[None])
+def top_k(request):
+    """Fixture to provide the top_k option to api.predict."""
+    return request.param
+
+
+@pytest.fixture(scope="module", params=[None])
+def precision(request):
+    """Fixture to provide the precision option to api.predict."""
+    return request.param
+
+
+@pytest.fixture(scope="module", params=[None])
+def block_rows(request):
+    """Fixture to provide the block_rows option to api.predict."""
+    return request.param
+
+
+@pytest.fixture(scope="module", params=[None])
+def accept_encoding(request):
+    """Fixture to provide the accept_encoding option to api.predict."""
+    return request.param
+
+
 @pytest.fixture(scope="module", params=["application/json"])
 def accept(request):
     """Fixture to provide the accept argument to api.predict."""
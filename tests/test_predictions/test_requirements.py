@@ -17,6 +17,29 @@ the same folder. However, remember to add the prefix `test_` to the file.
 """
 # pylint: disable=redefined-outer-name
 # pylint: disable=unused-argument
+import asyncio
+import gzip
+import io
+import json
+import multiprocessing
+import multiprocessing.pool
+import os
+import pathlib
+import pickle
+import time
+import zipfile
+from concurrent import futures
+
+import keras
+import numpy as np
+import pytest
+import tensorflow as tf
+from deepaas.model.v2.wrapper import ModelWrapper
+
+import api
+import demo_advanced as aimodel
+from demo_advanced.models import make_autoencoder, make_dense2ly
+from demo_advanced.models import make_pipeline
 
 
 def test_predictions_type(predictions):
@@ -41,3 +64,536 @@ def test_predictions_sum(predictions):
     """Tests that sum of ind predictions totals ~1.0."""
     for prediction in predictions[0:10]:
         assert 0.99 < sum(prediction) < 1.01
+
+
+def test_model_cached(predictions, model_name):
+    """Tests that the model used for predictions is kept in memory."""
+    cached = aimodel.cache.models.stats()["models"]
+    assert any(uri.endswith(model_name) for uri in cached)
+
+
+def test_async_predictions(async_predictions, predictions, model_threads):
+    """Tests that coroutine predictions run on the inference executor."""
+    assert isinstance(async_predictions, list)
+    assert len(async_predictions) == len(predictions)
+    assert model_threads
+    assert all(x.startswith("inference") for x in model_threads)
+
+
+def test_warm_models(tempdir, save_model, configure, monkeypatch):
+    """Tests that warm predicts each batch size and skips broken models."""
+    save_model("warm.keras", keras.Input((4,)), keras.layers.Dense(2))
+    predicted, predict = [], aimodel.compiled.predict
+
+    def recorded(model, input_data, **options):
+        predicted.append(input_data.shape)
+        return predict(model, input_data, **options)
+
+    broken = pathlib.Path(tempdir, aimodel.config.MODELS_URI, "broken")
+    broken.mkdir()
+    (broken / aimodel.ensemble.DEFINITION_FILE).write_text("{")
+    configure(INFERENCE_BUCKETS=())
+    monkeypatch.setattr(aimodel.compiled, "predict", recorded)
+    assert aimodel.warm(["warm.keras", "broken"], batch_sizes=(1, 8))
+    assert aimodel.registry.resolve("warm.keras") in aimodel.cache.models
+    assert sorted(predicted) == [(1, 4), (8, 4)]
+
+
+def test_input_dtype_rejected(tempdir, model_name):
+    """Tests that unsupported input types fail before loading the model."""
+    np.save(f"{tempdir}/invalid.npy", np.zeros((2, 28, 28), "int64"))
+    with pytest.raises(ValueError, match="dtype"):
+        aimodel.predict(model_name, f"{tempdir}/invalid.npy")
+
+
+def test_dataset_array(path_testdata):
+    """Tests that dataset arrays are mapped from the processed file."""
+    dataset = f"{path_testdata}/processed/t100-dataset.npz"
+    input_data = aimodel.inputs.open_array(dataset, "x_train")
+    with np.load(dataset) as arrays:
+        assert np.array_equal(input_data, arrays["x_train"])
+
+
+def test_sharded_predictions(tempdir, save_model, configure, monkeypatch):
+    """Tests that sharded predictions match the unsharded model output."""
+    layers = keras.Input((4,)), keras.layers.Dense(3)
+    model = save_model("shards.keras", *layers)
+    input_data = np.random.rand(30, 4).astype("float32")
+    np.save(f"{tempdir}/shards.npy", input_data)
+    expected = aimodel.predict("shards.keras", f"{tempdir}/shards.npy")
+    configure(SHARD_MIN_ROWS=10, SHARD_WORKERS=2, SHARD_SIZE=7)
+    monkeypatch.setattr(aimodel.sharding, "_executor", None)
+    sharded, predict = [], aimodel.sharding.predict
+
+    def recorded(model_uri, input_file, array_name, rows, **options):
+        sharded.append(rows)
+        return predict(model_uri, input_file, array_name, rows, **options)
+
+    monkeypatch.setattr(aimodel.sharding, "predict", recorded)
+    try:
+        result = aimodel.predict("shards.keras", f"{tempdir}/shards.npy")
+    finally:
+        aimodel.sharding.get_executor().shutdown()
+    assert sharded == [30]
+    assert result.shape == (30, 3)
+    assert np.allclose(result, expected, atol=1e-6)
+    assert np.allclose(result, model.predict(input_data), atol=1e-6)
+
+
+def test_result_cache_tiers(tempdir):
+    """Tests that cached results are found in memory and on disk."""
+    store = aimodel.results.ResultCache(2**20, f"{tempdir}/results", 2**20)
+    store.put("key", np.ones((2, 10)))
+    assert store.get("key") is not None
+    restarted = aimodel.results.ResultCache(0, f"{tempdir}/results", 2**20)
+    assert np.array_equal(restarted.get("key"), np.ones((2, 10)))
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_admission_overload():
+    """Tests that requests beyond the waiting queue fail fast."""
+    controller = aimodel.admission.Admission(concurrency=1, max_queue=0)
+    with controller.admit():
+        with pytest.raises(aimodel.admission.OverloadError):
+            with controller.admit():
+                pass
+    assert controller.stats()["rejected"] == 1
+
+
+def test_overload_unavailable(predict_kwds, monkeypatch):
+    """Tests that overloaded models return 503 with a retry hint."""
+    def overloaded(*args, **kwargs):  # fmt: skip
+        raise aimodel.admission.OverloadError("Model overloaded.")
+    monkeypatch.setattr(aimodel, "predict", overloaded)
+    with pytest.raises(api.utils.ServiceUnavailable) as error:
+        api.predict(**predict_kwds)
+    error = pickle.loads(pickle.dumps(error.value))  # From pool processes
+    assert error.status == 503
+    assert error.headers["Retry-After"] == str(api.config.RETRY_AFTER)
+
+
+def test_deadline_timeout(predict_kwds):
+    """Tests that requests dropped on their deadline return 504."""
+    with pytest.raises(api.utils.GatewayTimeout) as error:
+        api.predict(**{**predict_kwds, "timeout": 1e-9})
+    error = pickle.loads(pickle.dumps(error.value))  # From pool processes
+    assert error.status == 504
+
+
+def test_batching_concurrent():
+    """Tests that concurrent requests are joined and their rows scattered."""
+    batches = []
+
+    def predict_fn(input_data):
+        batches.append(len(input_data))
+        return input_data * 2
+
+    batcher = aimodel.batching.MicroBatcher(predict_fn, 10, max_wait=5.0)
+    inputs = [np.full((rows, 3), rows, "float32") for rows in (1, 2, 3, 4)]
+    with futures.ThreadPoolExecutor(len(inputs)) as executor:
+        results = list(executor.map(batcher.predict, inputs))
+    assert batches == [10]
+    for input_data, result in zip(inputs, results):
+        assert np.array_equal(result, input_data * 2)
+    assert batcher.stats()["batch_fill_ratio"] == 1.0
+
+
+def test_compiled_buckets():
+    """Tests that bucketed predictions trace each bucket only once."""
+    model = keras.Sequential([keras.Input((4,)), keras.layers.Dense(2)])
+    wrapper = aimodel.compiled.BucketedModel(model, buckets=(1, 8))
+    for rows in (1, 3, 5, 8, 11):
+        input_data = np.random.rand(rows, 4).astype("float32")
+        result = wrapper.predict(input_data)
+        expected = model.predict(input_data, verbose=0)
+        assert np.allclose(result, expected, atol=1e-6)
+    assert wrapper.stats()["traces"] == 2
+
+
+def test_cascade_escalation(save_model):
+    """Tests that only low confidence rows are predicted by the cascade."""
+    layers = keras.Input((4,)), keras.layers.Softmax()
+    model = save_model("expensive.keras", *layers)
+    input_data = np.eye(4, dtype="float32")
+    result = np.full((4, 4), 0.25, "float32")
+    result[:2] = np.eye(4)[:2]  # Confident cheap predictions
+    cascade = aimodel.cascade
+    merged = cascade.predict("expensive.keras", input_data, result, 0.9)
+    assert np.array_equal(merged["predictions"][:2], result[:2])
+    assert np.allclose(merged["predictions"][2:], model(input_data[2:]))
+    assert merged["escalated"] == 0.5
+
+
+def test_cascade_predictions(mocked_predict, predict_kwds, model_name):
+    """Tests that cascades return predictions and the escalated fraction."""
+    options = {"cascade_model": model_name, "threshold": 0.9}
+    result = mocked_predict(**{**predict_kwds, **options})
+    assert all(len(x) == 10 for x in result["predictions"])
+    assert 0.0 <= result["escalated"] <= 1.0
+
+
+def test_pipeline_model(tempdir, path_testdata):
+    """Tests that pipeline models classify raw images in one predict."""
+    options = {"verbosity": "INFO", "latent_dim": 32, "input_len": 32}
+    make_autoencoder._run_command("autoencoder.keras", **options)
+    make_dense2ly._run_command("dense2ly.keras", learning_rate=0.1, **options)
+    make_pipeline._run_command(
+        "pipeline.keras", "autoencoder.keras", "dense2ly.keras", **options
+    )
+    input_file = path_testdata / "external" / "t100-images.npy"
+    result = aimodel.predict("pipeline.keras", input_file)
+    models_uri = f"{tempdir}/{aimodel.config.MODELS_URI}"
+    autoencoder = keras.models.load_model(f"{models_uri}/autoencoder.keras")
+    classifier = keras.models.load_model(f"{models_uri}/dense2ly.keras")
+    latent = keras.Sequential(make_pipeline.encoder_layers(autoencoder, (32,)))
+    expected = classifier.predict(latent.predict(np.load(input_file)))
+    assert result.shape == (len(expected), 10)
+    assert np.allclose(result, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize("rule", aimodel.ensemble.RULES)
+def test_ensemble_rules(rule):
+    """Tests that member outputs are combined into class probabilities."""
+    outputs = {"a": np.eye(3)[[0, 1]], "b": np.eye(3)[[0, 2]]}
+    ensemble = aimodel.ensemble
+    result = ensemble.predict(
+        predict_fn=lambda uri: outputs[uri.name],
+        **ensemble.validate(["a", "b"], rule=rule, weights=[1, 1]),
+    )
+    assert np.allclose(result["predictions"], [[1, 0, 0], [0, 0.5, 0.5]])
+    assert set(result["members"]) == {"a", "b"}
+
+
+def test_ensemble_folder(tempdir, mocked_predict, predict_kwds, model_name):
+    """Tests that ensemble folders combine their members on api.predict."""
+    folder = pathlib.Path(tempdir, api.config.MODELS_URI, "pair")
+    folder.mkdir(exist_ok=True)
+    definition = {"members": [model_name, model_name], "rule": "mean"}
+    definition_file = folder / aimodel.ensemble.DEFINITION_FILE
+    definition_file.write_text(json.dumps(definition))
+    options = {"model_name": "pair", "rule": "vote"}  # Request overrides
+    result = mocked_predict(**{**predict_kwds, **options})
+    assert all(sum(x) == 1.0 for x in result["predictions"])
+    assert set(x * 2 % 1 for x in np.ravel(result["predictions"])) == {0.0}
+    assert list(result["members"]) == [model_name]
+
+
+def test_registry_versions(tempdir):
+    """Tests that new versions are staged and promoted by alias swaps."""
+    model = keras.Sequential([keras.Input((4,)), keras.layers.Dense(2)])
+    registry = aimodel.registry
+    assert registry.publish("versioned", model) == 1
+    assert registry.publish("versioned", model) == 2
+    assert registry.resolve("versioned").name == "1.keras"
+    assert registry.resolve("versioned", "Staging").name == "2.keras"
+    registry.promote("versioned", 2)
+    assert registry.resolve("versioned").name == "2.keras"
+    assert registry.resolve("versioned", 1).name == "1.keras"
+
+
+def test_threads_plan(tempdir, monkeypatch):
+    """Tests that workers get whole cores from the same socket."""
+    for cpu in range(8):  # 2 sockets with 2 cores of 2 threads
+        path = pathlib.Path(tempdir, "cpus", f"cpu{cpu}", "topology")
+        path.mkdir(parents=True)
+        path.joinpath("physical_package_id").write_text(str(cpu // 4))
+        path.joinpath("core_id").write_text(str(cpu % 4 // 2))
+    threads = aimodel.threads
+    monkeypatch.setattr(threads, "CPU_TOPOLOGY", f"{tempdir}/cpus")
+    monkeypatch.setattr(threads, "host_cpus", lambda: range(8))
+    assert [x["cpus"] for x in threads.plan(2)] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert threads.plan(2)[0]["intra_op"] == 2
+    assert threads.parse_cpus("0-2,5") == [0, 1, 2, 5]
+
+
+def test_threads_worker_index():
+    """Tests that only DEEPaaS-like pool processes get their own index."""
+    context = multiprocessing.get_context("spawn")
+    pools = [multiprocessing.pool.Pool(1, context=context) for _ in "ab"]
+    try:
+        indexes = [x.apply(aimodel.threads.worker_index) for x in pools]
+    finally:
+        for pool in pools:
+            pool.terminate()
+    with futures.ProcessPoolExecutor(1, mp_context=context) as shards:
+        assert shards.submit(aimodel.threads.worker_index).result() is None
+    assert aimodel.threads.worker_index() is None
+    assert len(set(indexes)) == len(pools)
+
+
+def test_shadow_agreement(tempdir, configure):
+    """Tests that mirrored inputs are compared in background."""
+    model = keras.Sequential([keras.Input((4,)), keras.layers.Softmax()])
+    aimodel.registry.publish("shadowed", model)
+    configure(SHADOW_RATE=1.0)
+    evaluator = aimodel.shadow.ShadowEvaluator(max_queue=4)
+    input_data = np.eye(4, dtype="float32")
+    assert evaluator.submit("shadowed", input_data, input_data, 0.1)
+    for _ in range(100):  # Wait for the background evaluation
+        if evaluator.stats()["evaluated"]:
+            break
+        time.sleep(0.1)
+    assert evaluator.stats()["agreement"] == 1.0
+
+
+def test_shadow_same_model(tempdir, configure):
+    """Tests that flat layout models are not mirrored to themselves."""
+    configure(SHADOW_RATE=1.0, SHADOW_MODEL="")
+    evaluator = aimodel.shadow.ShadowEvaluator(max_queue=4)
+    model_uri = aimodel.registry.resolve("flat")
+    input_data = np.eye(4, dtype="float32")
+    args = "flat", input_data, input_data, 0.1
+    assert not evaluator.submit(*args, model_uri=model_uri)
+
+
+def test_top_k_response():
+    """Tests that top-k responses keep the best classes in order."""
+    result = np.random.dirichlet(np.ones(10), size=[20])
+    compact = api.responses.top_k(result, 3)
+    expected = np.argsort(-result, axis=-1)[:, :3]
+    assert np.array_equal(compact["labels"], expected)
+    assert compact["probabilities"].dtype == np.float16
+    labels = api.responses.json_response(api.responses.top_k(result, 1))
+    assert labels["labels"] == np.argmax(result, axis=-1).tolist()
+
+
+def test_binary_responses():
+    """Tests that npy and npz responses load back as numpy arrays."""
+    result = np.random.dirichlet(np.ones(10), size=[20]).astype("float32")
+    buffer = api.responses.npy_response(result)
+    assert np.array_equal(np.load(buffer), result)
+    buffer = api.responses.npz_response(
+        {"predictions": result, "escalated": 0.5}, precision="float16"
+    )
+    with np.load(buffer) as arrays:
+        assert arrays["predictions"].dtype == np.float16
+        assert arrays["escalated"] == 0.5
+    buffer = api.responses.npy_response(api.responses.top_k(result, 3))
+    compact = np.load(buffer, allow_pickle=False)
+    assert compact["labels"].shape == (20, 3)
+    assert compact["probabilities"].dtype == np.float16
+
+
+def test_npy_top_k_predictions(mocked_predict, predict_kwds):
+    """Tests that api.predict returns top-k results in npy format."""
+    options = {"accept": "application/x-npy", "top_k": 3}
+    buffer = mocked_predict(**{**predict_kwds, **options})
+    compact = np.load(buffer, allow_pickle=False)
+    assert compact["labels"].shape[1:] == (3,)
+
+
+def test_compressed_response():
+    """Tests that binary responses are compressed when accepted."""
+    result = np.random.dirichlet(np.ones(10), size=[200]).astype("float32")
+    raw = api.responses.npy_response(result).getvalue()
+    buffer = api.responses.npy_response(result)
+    response = api.responses.compress(buffer, "br, gzip;q=0.5, zstd;q=0")
+    filename = response._value.name
+    headers, body = _streamed(response)
+    assert not os.path.exists(filename)  # Removed once opened
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) == raw
+    buffer = api.responses.npy_response(result[:1])  # Below threshold
+    assert api.responses.compress(buffer, "gzip") is buffer
+    file = api.responses.ndjson_response(result)
+    response = api.responses.compress(file, "gzip")
+    assert not os.path.exists(file.name)  # Compressed copy only
+    lines = gzip.decompress(_streamed(response)[1]).splitlines()
+    assert len(lines) == len(result)
+    file = api.responses.ndjson_response(result)
+    headers, body = _streamed(api.responses.compress(file))
+    assert "Content-Encoding" not in headers
+    assert body.count(b"\n") == len(result)
+    assert not os.path.exists(file.name)
+    assert api.responses.negotiate("identity, *;q=0") is None
+
+
+def _streamed(response):
+    copy = pickle.loads(pickle.dumps(response))  # From pool processes
+    asyncio.run(response.close())  # Pool process copy is dropped
+
+    async def stream():
+        body = await copy.as_bytes()
+        await copy.close()
+        return copy.headers, body
+
+    return asyncio.run(stream())
+
+
+def test_predict_chunks(tempdir, save_model):
+    """Tests that chunked predictions join into the full prediction."""
+    save_model("stream.keras", keras.Input((4,)), keras.layers.Softmax())
+    np.save(f"{tempdir}/stream.npy", np.random.rand(10, 4).astype("float32"))
+    chunks = list(aimodel.predict_chunks("stream.keras", "stream.npy", 4))
+    assert [start for start, _ in chunks] == [0, 4, 8]
+    result = aimodel.predict("stream.keras", "stream.npy")
+    assert np.allclose(np.concatenate([x for _, x in chunks]), result)
+
+
+def test_ndjson_response():
+    """Tests that chunked predictions are emitted as json lines."""
+    result = np.random.dirichlet(np.ones(10), size=[20]).astype("float32")
+    chunks = iter([(0, result[:12]), (12, {"predictions": result[12:]})])
+    response = api.responses.ndjson_response(chunks)
+    assert isinstance(response, io.BufferedReader)
+    returned = ModelWrapper.predict_wrap(lambda: response)
+    returned = pickle.loads(pickle.dumps(returned))  # From pool processes
+    with response, open(returned.filename, "rb") as file:
+        lines = file.read().decode().splitlines()
+    os.remove(returned.filename)
+    assert [json.loads(x)["row"] for x in lines] == list(range(20))
+    row = json.loads(lines[15])["predictions"]
+    assert np.allclose(row, result[15], atol=1e-6)  # JSON_DECIMALS
+    with api.responses.ndjson_response(result, block_rows=8) as response:
+        lines = response.read().decode().splitlines()
+    os.remove(response.name)
+    rows = [json.loads(x)["rows"] for x in lines]
+    assert rows == [[0, 8], [8, 16], [16, 20]]
+
+
+def test_ndjson_history():
+    """Tests that training results are emitted as one line per epoch."""
+    history = keras.callbacks.History()
+    history.history, history.epoch = {"loss": [0.5, 0.4]}, [0, 1]
+    with api.responses.ndjson_response(history) as response:
+        lines = response.read().decode().splitlines()
+    os.remove(response.name)
+    assert [json.loads(x)["epoch"] for x in lines] == [0, 1]
+    assert [json.loads(x)["loss"] for x in lines] == [0.5, 0.4]
+
+
+def test_pdf_report_sampled(configure):
+    """Tests that pdf reports list at most PDF_MAX_ROWS sampled rows."""
+    configure(PDF_MAX_ROWS=50)
+    result = np.random.dirichlet(np.ones(10), size=[500]).astype("float32")
+    arrays = {"predictions": result, "escalated": np.asarray(0.5)}
+    header, lines, total = api.responses._report_table(arrays, 120)
+    assert header.split()[:3] == ["row", "label", "conf"]
+    assert len(lines) == 50 and total == 500
+    assert int(lines[-1].split()[0]) == 499
+    buffer = api.responses.pdf_response({"predictions": result})
+    assert buffer.getvalue().startswith(b"%PDF")
+
+
+def test_pdf_predictions(mocked_predict, predict_kwds):
+    """Tests that api.predict returns pdf reports when accepted."""
+    options = {"accept": "application/pdf", "top_k": 3}
+    buffer = mocked_predict(**{**predict_kwds, **options})
+    assert buffer.name == "output.pdf"
+    assert buffer.getvalue().startswith(b"%PDF")
+
+
+@pytest.mark.parametrize("orjson", [True, False])
+def test_json_dumps(monkeypatch, orjson):
+    """Tests that arrays encoded in bulk match the json response values."""
+    if not orjson:  # Numpy formatting fallback
+        monkeypatch.setattr(api.responses, "orjson", None)
+    result = np.random.randn(300, 10).astype("float32") * 100
+    result = {"predictions": result, "labels": np.arange(300), "ratio": 0.5}
+    expected = api.responses.json_response(result)
+    encoded = json.loads(api.responses.dumps(result))
+    assert encoded["labels"] == expected["labels"] and encoded["ratio"] == 0.5
+    predictions = np.array(encoded["predictions"])
+    assert np.allclose(predictions, expected["predictions"], rtol=0, atol=1e-9)
+    assert np.allclose(predictions, np.round(predictions, 6), rtol=0)
+
+
+@pytest.mark.parametrize("dtype", ["int64", "uint64"])
+def test_json_dumps_integers(monkeypatch, dtype):
+    """Tests that integers above float64 precision are encoded exactly."""
+    monkeypatch.setattr(api.responses, "orjson", None)
+    result = np.arange(300, dtype=dtype) + np.array(2**53 + 1, dtype)
+    if dtype == "uint64":  # Beyond int64, formatted by json
+        result[-1] = 2**64 - 1
+    else:
+        result[::2] *= -1
+    encoded = json.loads(api.responses.dumps({"labels": result}))
+    assert encoded["labels"] == result.tolist()
+
+
+def test_image_archive(tempdir, save_model):
+    """Tests that images in archives are predicted with their file names."""
+    save_model("images.keras", keras.Input((28, 28)), keras.layers.Flatten())
+    with zipfile.ZipFile(f"{tempdir}/images.zip", "w") as archive:
+        for name, value in [("a.png", 255), ("b/c.png", 0)]:
+            image = np.full((56, 40, 3), value, dtype="uint8")
+            archive.writestr(name, tf.io.encode_png(image).numpy())
+        archive.writestr("b/notes.txt", b"Not an image")
+    assert aimodel.images.is_archive(f"{tempdir}/images.zip")
+    result = aimodel.predict("images.keras", f"{tempdir}/images.zip")
+    assert result["files"].tolist() == ["a.png", "b/c.png"]
+    assert np.allclose(result["predictions"], [[1.0] * 784, [0.0] * 784])
+
+
+def test_image_dimensions():
+    """Tests that images wider than the maximum fail before decoding."""
+    image = np.zeros((1, aimodel.config.IMAGE_MAX_SIDE + 1, 3), "uint8")
+    for encode in (tf.io.encode_png, tf.io.encode_jpeg):
+        data = encode(image).numpy()
+        assert aimodel.images._image_shape(data) == image.shape[:2]
+        with pytest.raises(ValueError, match="too large"):
+            aimodel.images._decode(data, "wide", None)
+    data = tf.io.encode_png(np.zeros((1, 1, 3), "uint8")).numpy()
+    bomb = data[:16] + (2**20).to_bytes(4, "big") * 2 + data[24:]
+    with pytest.raises(ValueError, match="too large"):
+        aimodel.images._decode(bomb, "bomb", None)
+
+
+NUMPY_FAMILIES = {
+    "dense": [
+        keras.Input((784,)),
+        keras.layers.Dense(16, activation="relu"),
+        keras.layers.Dense(10, activation="softmax"),
+    ],
+    "convolution": [
+        keras.Input((28, 28, 1)),
+        keras.layers.Conv2D(4, (3, 3), activation="relu"),
+        keras.layers.MaxPooling2D((2, 2)),
+        keras.layers.Conv2D(8, (3, 3), (2, 2), "same", activation="tanh"),
+        keras.layers.MaxPooling2D((3, 3), (2, 2), "same"),
+        keras.layers.Flatten(),
+        keras.layers.Dropout(0.5),
+        keras.layers.Dense(10, activation="softmax"),
+    ],
+    "autoencoder": [
+        keras.Input((28, 28, 1)),
+        keras.Sequential([keras.layers.Flatten()]),  # Nested pipeline
+        keras.layers.Dense(8, activation="relu"),
+        keras.layers.Dense(784, activation="sigmoid"),
+        keras.layers.Reshape((28, 28)),
+    ],
+}
+
+
+@pytest.mark.parametrize("family", NUMPY_FAMILIES)
+def test_numpy_backend(tempdir, family):
+    """Tests that numpy exports predict as the exported keras models."""
+    model = keras.Sequential(NUMPY_FAMILIES[family])
+    registry = aimodel.registry
+    registry.publish(family, model)
+    export = aimodel.numpy_backend.export(model)
+    registry.publish(family, export, suffix=aimodel.numpy_backend.SUFFIX)
+    model_uri = registry.resolve(family, "Staging")
+    assert model_uri.name == "2.npz"
+    export = aimodel.cache.load_model(model_uri)
+    assert isinstance(export, aimodel.numpy_backend.NumpyModel)
+    input_data = np.random.rand(5, 28, 28).astype("float32")
+    result = aimodel.compiled.predict(export, input_data, batch_size=2)
+    expected = model.predict(input_data.reshape(5, *model.input_shape[1:]))
+    assert np.allclose(result, expected, atol=1e-5)
+
+
+def test_shared_weights(tempdir, save_model, configure):
+    """Tests that numpy exports compute on shared read-only weight maps."""
+    model = save_model("shared.keras", *NUMPY_FAMILIES["dense"])
+    model_uri = f"{tempdir}/{aimodel.config.MODELS_URI}/shared.npz"
+    aimodel.numpy_backend.export(model).save(model_uri)
+    configure(SHARED_WEIGHTS_URI=f"{tempdir}/shm")
+    export = aimodel.cache.load_model(model_uri)
+    assert all(isinstance(x, np.memmap) for x in export.get_weights())
+    assert not any(x.flags.writeable for x in export.get_weights())
+    aimodel.cache.load_model(model_uri.replace(".npz", ".keras"))
+    assert len(list(pathlib.Path(f"{tempdir}/shm").iterdir())) == 1
+    input_data = np.random.rand(5, 784).astype("float32")
+    expected = model.predict(input_data)
+    assert np.allclose(export.predict(input_data), expected, atol=1e-5)
@@ -17,6 +17,13 @@ the same folder. However, remember to add the prefix `test_` to the file.
 """
 # pylint: disable=redefined-outer-name
 # pylint: disable=unused-argument
+import json
+
+import keras
+import numpy as np
+
+import api
+import demo_advanced as aimodel
 
 
 def test_loss(training):
@@ -29,3 +36,35 @@ def test_accuracy(training):
     """Test training result includes accuracy on the return."""
     assert "categorical_accuracy" in training
     assert isinstance(training["categorical_accuracy"], list)
+
+
+def test_async_training(async_training, training, model_threads):
+    """Test coroutine training runs on the training executor."""
+    assert async_training.keys() == training.keys()
+    assert model_threads
+    assert all(x.startswith("training") for x in model_threads)
+
+
+def test_train_content_types():
+    """Test training accepts only types DEEPaaS can return as json."""
+    history = keras.callbacks.History()
+    history.history, history.epoch = {"loss": [0.5, 0.4]}, [0, 1]
+    for accept in api.responses.train_content_types:
+        json.dumps(api.responses.content_types[accept](history))
+    for accept in set(api.responses.content_types) - {"application/json"}:
+        errors = api.schemas.TrainArgsSchema().validate({"accept": accept})
+        assert "accept" in errors
+
+
+def test_cached_model_untouched(tempdir, save_model):
+    """Test training flat layout models does not modify the cached model."""
+    save_model("flat.keras", keras.Input((4,)), keras.layers.Dense(2))
+    train_data = {"x_train": np.ones((8, 4)), "y_train": np.ones((8, 2))}
+    np.savez(f"{tempdir}/train.npz", **train_data)
+    model_uri = aimodel.registry.resolve("flat.keras")
+    cached = aimodel.cache.load_model(model_uri)
+    weights = cached.get_weights()
+    aimodel.train("flat.keras", f"{tempdir}/train.npz", epochs=1)
+    for before, after in zip(weights, cached.get_weights()):
+        assert np.array_equal(before, after)
+    assert model_uri not in aimodel.cache.models